@@ -18,7 +18,13 @@ Main Features
  Modules
 -------------
     db_manager(DBManager): SQLite database manager.
+    sharding(ShardedDBManager): SQLite database sharded by month or vehicle hash.
+    archive: compressed, delta-encoded archive files of closed months (see DBManager.archive).
     gps(GpsDataReader): transportation routes analysis and visualization.
+    time_index(TimeIndex): vehicle position at given moments (nearest fix/interpolation).
+    visualization: route maps and diagrams rendering (folium/plotly loaded on demand).
+    reports(BatchReportRenderer): parallel rendering of vehicles maps and diagrams to files.
+    live(LiveIngestor): live ingestion of gps signals in micro-batches.
 
 Created by Daniel Pruszyński
 """
\ No newline at end of file
@@ -0,0 +1,159 @@
+import os
+import numpy as np
+
+# 'gps' table columns by archive encoding ("id" and "dt" - delta encoded integers)
+TEXT_COLUMNS = ('vehicle', 'driver', 'position', 'country')  # dictionary encoded
+INTEGER_COLUMNS = ('speed', 'ignition_status', 'engine_status')  # INTEGER affinity - integral values as int
+
+
+def encode(rows, col_names):
+    """Encode rows (list of tuples) of gps table as arrays for compressed archive file.
+
+        "id" and "dt" (seconds) are stored as deltas, text columns as dictionary codes and numeric columns
+        as deltas of float64 bit patterns (lossless - slowly changing values give small deltas).
+        None values are stored as masks.
+
+        Returns
+        ----------
+        dict: {array name: numpy.array}
+    """
+    columns = dict(zip(col_names, zip(*rows))) if rows else {col: () for col in col_names}
+    arrays = dict()
+
+    for col, values in columns.items():
+        if col in ('id', 'dt'):
+            integers = np.array(values, dtype='datetime64[s]' if col == 'dt' else 'int64').astype('int64')
+            arrays[col] = np.diff(integers, prepend=0)
+        elif col in TEXT_COLUMNS:
+            values = np.array(values, dtype=object)
+            missing = np.array([value is None for value in values], dtype=bool)
+            uniques, codes = np.unique(values[~missing].astype(str), return_inverse=True)
+            arrays[col + '_uniques'] = uniques
+            arrays[col] = np.full(len(values), -1, dtype='int32')
+            arrays[col][~missing] = codes
+        else:
+            missing = np.array([value is None for value in values], dtype=bool)
+            numbers = np.array([0.0 if value is None else value for value in values], dtype='float64')
+            arrays[col] = np.diff(numbers.view('int64'), prepend=0)
+            arrays[col + '_missing'] = missing
+    return arrays
+
+
+def _dt_strings(seconds):
+    """Seconds as "dt" strings. Format - "yyyy-mm-dd hh:mm:ss"."""
+    dt = np.datetime_as_string(seconds.astype('datetime64[s]'))
+    return np.char.replace(dt, 'T', ' ') if len(dt) else dt
+
+
+def decode(arrays, col_names, selected=None):
+    """Decode archive arrays (see encode) to columns {column name: list of values}.
+    selected (numpy.array of bool, optional) - decode only selected rows."""
+    selected = slice(None) if selected is None else selected
+    columns = dict()
+    for col in col_names:
+        if col == 'id':
+            columns[col] = np.cumsum(arrays[col])[selected].tolist()
+        elif col == 'dt':
+            columns[col] = _dt_strings(np.cumsum(arrays[col])[selected]).tolist()
+        elif col in TEXT_COLUMNS:
+            uniques = np.append(arrays[col + '_uniques'].astype(object), None)  # code -1 - None
+            columns[col] = uniques[arrays[col][selected]].tolist()
+        else:
+            numbers = np.cumsum(arrays[col]).view('float64')[selected].astype(object)
+            if col in INTEGER_COLUMNS:
+                numbers = np.array([int(value) if value.is_integer() else value for value in numbers], dtype=object)
+            numbers[arrays[col + '_missing'][selected]] = None
+            columns[col] = numbers.tolist()
+    return columns
+
+
+def write(path, rows, col_names):
+    """Write rows to compressed archive file (replaced atomically)."""
+    with open(path + '.tmp', 'wb') as file:
+        np.savez_compressed(file, **encode(rows, col_names))
+    os.replace(path + '.tmp', path)
+
+
+def _contains(arrays, col, pattern):
+    """Rows with text containing pattern, case insensitive - as SQL LIKE '%pattern%'."""
+    if not pattern:
+        return np.ones(len(arrays[col]), dtype=bool)
+    matches = np.array([pattern.lower() in value.lower() for value in arrays[col + '_uniques']] + [False])
+    return matches[arrays[col]]
+
+
+def _isin(arrays, col, values):
+    """Rows with text equal to one of values."""
+    matches = np.array([value in values for value in arrays[col + '_uniques']] + [False])
+    return matches[arrays[col]]
+
+
+def read(path, col_names, vehicle='', driver='', between=None, after_id=0, vehicles=None):
+    """Read rows of archive file matching filter arguments (see DBManager.search_values). Rows are filtered
+    by vehicle before other arrays are decompressed and decoded.
+
+        Parameters
+        ----------
+            vehicles (set of str, optional): exact vehicles of rows. Default - None (all vehicles).
+
+        Returns
+        ----------
+        list of tuples: rows in "id" order.
+    """
+    with np.load(path) as archive_file:  # arrays are decompressed on first access
+        selected = _contains(archive_file, 'vehicle', vehicle)
+        if vehicles is not None:
+            selected &= _isin(archive_file, 'vehicle', vehicles)
+        if not selected.any():
+            return []
+        arrays = {name: archive_file[name] for name in archive_file.files}
+
+    selected &= _contains(arrays, 'driver', driver) & (np.cumsum(arrays['id']) > after_id)
+    if between:
+        indices = np.flatnonzero(selected)
+        dt = _dt_strings(np.cumsum(arrays['dt'])[indices])
+        selected[indices[(dt < between[0]) | (dt > between[1])]] = False  # string comparison as in SQL
+
+    columns = decode(arrays, col_names, selected)
+    return list(zip(*[columns[col] for col in col_names]))
+
+
+def summarize(rows, col_names):
+    """Aggregates of rows (in "id" order) of every vehicle - route summary and travelled distance per day
+    computed as by DBManager.route_summary and DBManager.distance_summary, and endpoints (first and last
+    row by "id" and the last row by "dt").
+
+        Returns
+        ----------
+        list of dicts: aggregates of vehicles ('days' - {"yyyy-mm-dd": km}, 'points' - list of tuples).
+    """
+    vehicles = dict()
+    for row in rows:
+        vehicles.setdefault(row[col_names.index('vehicle')], []).append(row)
+
+    summaries = []
+    for vehicle, vehicle_rows in vehicles.items():
+        points = [dict(zip(col_names, row)) for row in vehicle_rows]
+        mileages = [point['mileage'] for point in points if point['mileage'] is not None]
+
+        # distance to the next point (forward filled mileage) is assigned to the date of the point
+        filled = []
+        for point in points:
+            filled.append(point['mileage'] if point['mileage'] is not None else (filled or [None])[-1])
+        days = dict()
+        for point, mileage, next_mileage in zip(points, filled, filled[1:] + [None]):
+            km = next_mileage - mileage if None not in (mileage, next_mileage) else 0.0
+            days[str(point['dt'])[:10]] = days.get(str(point['dt'])[:10], 0.0) + km
+
+        last_by_dt = max(vehicle_rows, key=lambda row: (str(row[col_names.index('dt')]), row[0]))
+        summaries.append({'vehicle': vehicle, 'rows': len(points),
+                          'drivers': sorted({point['driver'] for point in points} - {None}),
+                          'start_date': min(str(point['dt']) for point in points),
+                          'end_date': max(str(point['dt']) for point in points),
+                          'first_id': points[0]['id'], 'first_country': points[0]['country'],
+                          'last_id': points[-1]['id'], 'last_country': points[-1]['country'],
+                          'min_mileage': min(mileages, default=None), 'max_mileage': max(mileages, default=None),
+                          'first_mileage': mileages[0] if mileages else None, 'last_mileage': filled[-1],
+                          'last_date': str(points[-1]['dt'])[:10], 'days': days,
+                          'points': list(dict.fromkeys([vehicle_rows[0], vehicle_rows[-1], last_by_dt]))})
+    return summaries
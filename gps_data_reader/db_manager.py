@@ -1,12 +1,104 @@
+import json
 import sqlite3
 import numpy as np
 import pandas as pd
 from datetime import date
 import os
-from gps_data_reader.utils.validation import search_values_args_validation
+import shutil
+import threading
+from functools import wraps
+from operator import itemgetter
+from gps_data_reader import archive as archive_files
+from gps_data_reader.utils.validation import search_values_args_validation, events_args_validation, \
+    search_many_args_validation, archive_args_validation
 
-np.set_printoptions(precision=6, suppress=True, edgeitems=10, linewidth=100000,
-                    formatter=dict(float=lambda x: f'{x:.2f}'))
+EVENTS = ('entry', 'exit', 'ignition_on', 'ignition_off', 'engine_on', 'engine_off')
+
+
+def merge_route_summaries(summaries):
+    """Merges route summaries of route parts (e.g. shards) into route summary (see DBManager.route_summary).
+
+        Returns
+        ----------
+        dict
+    """
+    summaries = [summary for summary in summaries if summary['count']]
+    if not summaries:
+        return {'count': 0, 'vehicle': [], 'driver': [], 'start_date': None, 'end_date': None,
+                'first_id': None, 'first_country': None, 'last_id': None, 'last_country': None,
+                'min_mileage': None, 'max_mileage': None}
+
+    first = min(summaries, key=itemgetter('first_id'))
+    last = max(summaries, key=itemgetter('last_id'))
+    mileages = [summary[key] for summary in summaries for key in ('min_mileage', 'max_mileage')
+                if summary[key] is not None]
+
+    return {'count': sum(summary['count'] for summary in summaries),
+            'vehicle': sorted(set().union(*[summary['vehicle'] for summary in summaries])),
+            'driver': sorted(set().union(*[summary['driver'] for summary in summaries])),
+            'start_date': min(summary['start_date'] for summary in summaries),
+            'end_date': max(summary['end_date'] for summary in summaries),
+            'first_id': first['first_id'], 'first_country': first['first_country'],
+            'last_id': last['last_id'], 'last_country': last['last_country'],
+            'min_mileage': min(mileages, default=None), 'max_mileage': max(mileages, default=None)}
+
+
+def join_distance_summaries(summaries):
+    """Joins distance summaries of consecutive route parts into distance summary of the whole route
+    (see DBManager.distance_summary).
+
+        Returns
+        ----------
+        dict
+    """
+    joined = {'days': dict(), 'first_mileage': None, 'last_mileage': None, 'last_date': None,
+              'max_mileage': None}
+
+    for summary in summaries:
+        if summary['last_date'] is None:  # no points
+            continue
+        days = joined['days']
+        for day, km in summary['days'].items():
+            days[day] = days.get(day, 0) + km
+
+        # distance between parts is assigned to the last point of previous part
+        if None not in (joined['last_mileage'], summary['first_mileage']):
+            days[joined['last_date']] += summary['first_mileage'] - joined['last_mileage']
+        mileages = [mileage for mileage in (joined['max_mileage'], summary['max_mileage']) if mileage is not None]
+        joined = {'days': days,
+                  'first_mileage': summary['first_mileage'] if joined['first_mileage'] is None
+                  else joined['first_mileage'],
+                  'last_mileage': joined['last_mileage'] if summary['last_mileage'] is None
+                  else summary['last_mileage'],
+                  'last_date': summary['last_date'], 'max_mileage': max(mileages, default=None)}
+    return joined
+
+
+def merge_distance_summaries(summaries):
+    """Merges distance summaries of consecutive route parts (e.g. shards) into travelled distance per day.
+
+        Returns
+        ----------
+        pandas.Series
+    """
+    summary = join_distance_summaries(summaries)
+    daily_km = summary['days']
+
+    # last point - distance to the maximum mileage (see GpsDataReader.distance_diagram)
+    if None not in (summary['max_mileage'], summary['last_mileage']):
+        daily_km[summary['last_date']] += summary['max_mileage'] - summary['last_mileage']
+
+    return pd.Series(daily_km, name='km', dtype='float64').sort_index()
+
+
+def locked(method):
+    """Serializes method calls of instance with '_lock' attribute (connection/data shared by threads e.g.
+    LiveIngestor and the caller)."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class DBManager:
@@ -20,8 +112,9 @@ class DBManager:
 
     def __init__(self, database):
         self.database = database
-        self.__connect = sqlite3.connect(database, timeout=100)
+        self.__connect = sqlite3.connect(database, timeout=100, check_same_thread=False)
         self.__cursor = self.__connect.cursor()
+        self._lock = threading.RLock()  # one cursor shared by threads
 
     def __del__(self):
         self.__connect.close()
@@ -29,6 +122,7 @@ class DBManager:
     def __repr__(self):
         return f'Database ({self.database})'
 
+    @locked
     def info(self):
         """Get specifications of database tables."""
         try:
@@ -59,20 +153,25 @@ class DBManager:
         except IndexError:
             print(f'Database - {self.database} is empty. ')
 
+    @locked
     def commit(self):
         self.__cursor.execute("commit")
         self.__cursor.execute("begin")
 
+    @locked
     def rollback(self):
-        self.__cursor.execute("rollback")
+        self.__connect.rollback()  # no-op without open transaction (e.g. failed first insert)
 
+    @locked
     def begin_transaction(self):
         self.__cursor.execute("begin")
 
+    @locked
     def close(self):
         self.__connect.close()
 
-    def create_table(self, table: str):
+    @locked
+    def create_table(self, table: str, events=True):
         """Creates empty gps table with columns:
             "id", "dt", "vehicle", "driver", "position", "country",
             "speed", "mileage", "ignition_status", "engine_status",
@@ -81,6 +180,9 @@ class DBManager:
             Parameters
             ----------
                 table (str): table name.
+                events (bool, optional): True - creates also events table (table + '_events') filled during
+                                         inserts. Events of table with rows are created by build_events.
+                                         Default - True.
         """
         self.__cursor.execute('''CREATE TABLE IF NOT EXISTS {}
                             (
@@ -98,16 +200,157 @@ class DBManager:
                                 "latitude" REAL,
                                 PRIMARY KEY("id")
                             )'''.format(table))
+        self.__cursor.execute('''CREATE INDEX IF NOT EXISTS {0}_vehicle_dt ON {0} ("vehicle", "dt")'''.format(table))
+        self.__cursor.execute('''CREATE INDEX IF NOT EXISTS {0}_dt ON {0} ("dt")'''.format(table))
+
+        self.__cursor.execute("SELECT EXISTS (SELECT 1 FROM {})".format(table))
+        if events and not self.__cursor.fetchone()[0]:
+            self.create_events_table(table)
+
+    @locked
+    def create_events_table(self, table: str):
+        """Creates empty events table (table + '_events') for gps table with columns:
+            "id", "point_id", "dt", "vehicle", "driver", "position", "country",
+            "event", "detail", "longitude", "latitude".
+
+            Events: 'entry'/'exit' (country, detail - previous/next country), 'ignition_on'/'ignition_off',
+            'engine_on'/'engine_off'.
 
+            Parameters
+            ----------
+                table (str): gps table name.
+        """
+        self.__cursor.execute('''CREATE TABLE IF NOT EXISTS {}_events
+                            (
+                                "id" INTEGER NOT NULL,
+                                "point_id" INTEGER NOT NULL,
+                                "dt" TIMESTAMP NOT NULL,
+                                "vehicle" TEXT,
+                                "driver" TEXT,
+                                "position" TEXT,
+                                "country" TEXT,
+                                "event" TEXT NOT NULL,
+                                "detail" TEXT,
+                                "longitude" REAL,
+                                "latitude" REAL,
+                                PRIMARY KEY("id")
+                            )'''.format(table))
+        self.__cursor.execute('''CREATE INDEX IF NOT EXISTS {0}_events_dt ON {0}_events ("dt")'''.format(table))
+
+    @locked
+    def has_events(self, table):
+        self.__cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?", (table + '_events',))
+        return self.__cursor.fetchone()[0] > 0
+
+    def __insert_events(self, table, last_id):
+        """Derives events of rows with id greater than 'last_id'. Events of every vehicle are rebuilt from its
+        earliest new point (late points may be older than points inserted before) - stitched to the last point
+        before it (also the last archived point of vehicle - see archive)."""
+        self.__cursor.execute('''CREATE TEMP TABLE IF NOT EXISTS events_rebuild
+                            ("vehicle" TEXT, "start" TEXT, "context_id" INTEGER)''')
+        self.__cursor.execute("DELETE FROM events_rebuild")
+        self.__cursor.execute('''INSERT INTO events_rebuild
+                            SELECT "vehicle", "start",
+                                   (SELECT "id" FROM {0} AS previous
+                                    WHERE previous."vehicle" IS starts."vehicle" AND previous."dt" < starts."start"
+                                    ORDER BY previous."dt" DESC, previous."id" DESC LIMIT 1)
+                            FROM (SELECT "vehicle", MIN("dt") AS "start" FROM {0} WHERE "id" > ?
+                                  GROUP BY "vehicle") AS starts'''.format(table), (last_id,))
+        context_sources = [table]
+        if self.__archive_index(table):  # archived point when it is later than context point in table
+            context_sources.append(table + '_archive_points')
+            self.__cursor.execute('''UPDATE events_rebuild SET "context_id" = COALESCE(
+                                (SELECT previous."id" FROM {0}_archive_points AS previous
+                                 WHERE previous."vehicle" IS events_rebuild."vehicle"
+                                 AND previous."dt" < events_rebuild."start"
+                                 AND NOT EXISTS (SELECT 1 FROM {0} AS context
+                                                 WHERE context."id" = events_rebuild."context_id"
+                                                 AND (context."dt", context."id") > (previous."dt", previous."id"))
+                                 ORDER BY previous."dt" DESC, previous."id" DESC LIMIT 1), "context_id")'''
+                                  .format(table))
+
+        # events from the earliest new point on and exit of context point are derived again
+        self.__cursor.execute('''DELETE FROM {0}_events WHERE "id" IN
+                            (SELECT events."id" FROM events_rebuild AS rebuild
+                             JOIN {0}_events AS events ON events."vehicle" IS rebuild."vehicle"
+                             AND events."dt" >= rebuild."start")'''.format(table))
+        self.__cursor.execute('''DELETE FROM {0}_events WHERE "event" = 'exit'
+                            AND "point_id" IN (SELECT "context_id" FROM events_rebuild)'''.format(table))
+
+        # missing country is compared as value (IS NOT) - as in labels of selected points (GpsDataReader)
+        self.__cursor.execute('''WITH
+                            points AS (SELECT *, "id" IN (SELECT "context_id" FROM events_rebuild
+                                                           WHERE "context_id" IS NOT NULL) AS "context",
+                                LAG("id") OVER w AS previous_id,
+                                LEAD("id") OVER w AS next_id,
+                                LAG("country") OVER w AS previous_country,
+                                LEAD("country") OVER w AS next_country,
+                                LAG("ignition_status") OVER w AS previous_ignition,
+                                LAG("engine_status") OVER w AS previous_engine
+                                FROM (SELECT {0}.* FROM events_rebuild AS rebuild
+                                      JOIN {0} ON {0}."vehicle" IS rebuild."vehicle" AND {0}."dt" >= rebuild."start"
+                                      UNION ALL
+                                      {1})
+                                WINDOW w AS (PARTITION BY "vehicle" ORDER BY "dt", "id"))
+                            INSERT INTO {0}_events
+                            SELECT NULL, "id", "dt", "vehicle", "driver", "position", "country", "event", "detail",
+                                   "longitude", "latitude"
+                            FROM (SELECT *, 'exit' AS "event", next_country AS "detail" FROM points
+                                  WHERE next_id IS NOT NULL AND "country" IS NOT next_country
+                                  UNION ALL
+                                  SELECT *, 'entry', previous_country FROM points
+                                  WHERE NOT "context" AND previous_id IS NOT NULL AND "country" IS NOT previous_country
+                                  UNION ALL
+                                  SELECT *, CASE WHEN "ignition_status" THEN 'ignition_on' ELSE 'ignition_off' END, NULL FROM points
+                                  WHERE NOT "context" AND "ignition_status" != previous_ignition
+                                  UNION ALL
+                                  SELECT *, CASE WHEN "engine_status" THEN 'engine_on' ELSE 'engine_off' END, NULL FROM points
+                                  WHERE NOT "context" AND "engine_status" != previous_engine)
+                            ORDER BY "dt", "id"'''.format(table, ' UNION ALL '.join(
+                              '''SELECT * FROM {} WHERE "id" IN (SELECT "context_id" FROM events_rebuild)'''
+                              .format(source) for source in context_sources)))
+
+    @locked
+    def build_events(self, table):
+        """(Re)builds events table from all rows of gps table (e.g. for database created without events).
+        Events of archived rows (older than rows in table) are kept."""
+        self.create_events_table(table)
+        if self.archived_months(table):
+            self.__cursor.execute('''DELETE FROM {0}_events WHERE "dt" >= (SELECT MIN("dt") FROM {0})'''.format(table))
+        else:
+            self.__cursor.execute("DELETE FROM {}_events".format(table))
+        self.__insert_events(table, last_id=0)
+
+    @locked
     def insert_dataframe(self, table, df, if_exists='append'):
         """Insert values as pandas dataframe."""
+        last_id = self.last_id(table) if if_exists == 'append' and self.has_events(table) else 0
+        if 'id' not in df.columns and self.__archive_last_id(table):  # ids of archived rows are not reused
+            df = df.copy()
+            df.insert(0, 'id', range(self.last_id(table) + 1, self.last_id(table) + 1 + len(df)))
         df.to_sql(name=table, con=self.__connect, index=False, if_exists=if_exists)
 
-    def insert_values(self, table, values: list):
-        self.__cursor.executemany("INSERT INTO {} values (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)".format(table), values)
+        if self.has_events(table):
+            if if_exists == 'append':
+                self.__insert_events(table, last_id)
+            else:
+                self.build_events(table)
+
+    @locked
+    def insert_values(self, table, values: list, with_id=False):
+        """Insert values as list of tuples. with_id=True - tuples contain 'id' as first value."""
+        last_id = self.last_id(table)
+        if not with_id and self.__archive_last_id(table):  # ids of archived rows are not reused
+            values = [(row_id,) + tuple(row) for row_id, row in enumerate(values, start=last_id + 1)]
+            with_id = True
+        id_value = '?' if with_id else 'NULL'
+        self.__cursor.executemany("INSERT INTO {} values ({}, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)".format(table, id_value),
+                                  values)
+        if self.has_events(table):
+            self.__insert_events(table, last_id)
         print(f'{len(values)} rows added.')
 
-    def search_values(self, table, vehicle='', driver='', between=None):
+    def search_values(self, table, vehicle='', driver='', between=None, after_id=0):
         """Search values by filter arguments.
 
         'Parameters'
@@ -117,31 +360,339 @@ class DBManager:
             driver (str, optional): driver name/surname.
             date_range(list of str, optional): start/end date of route. Format - ["yyyy-mm-dd", "yyyy-mm-dd"].
                                                 Default - None.
+            after_id (int, optional): select only rows with greater id (rows added since the last search).
+                                      Default - 0.
+
+        Rows of archived months from date range are read from archive files (see DBManager.archive).
 
         'Yields'
         ----------
-            generator object
+            generator object - rows in "id" order.
         """
         search_values_args_validation(vehicle, driver, between)
+        between = self.__between_defaults(between)
 
-        if bool(between) is False:
-            between = ['2000-01-01', date.today().strftime("%Y-%m-%d")]
-        if bool(between[0]) is False:
-            between[0] = '2000-01-01'
-        if bool(between[1]) is False:
-            between[1] = date.today().strftime("%Y-%m-%d")
+        with self._lock:
+            archived = self.__read_archived(table, vehicle, driver, between, int(after_id))
 
-        self.__cursor.execute('''SELECT * FROM {}
-                            where "vehicle" LIKE (?)
-                            AND "driver" LIKE (?)
-                            AND "dt" BETWEEN (?) AND (?)'''.format(table),
-                              ("%" + vehicle + "%", "%" + driver + "%", between[0], between[1]))
+            self.__cursor.execute('''SELECT * FROM {}
+                                where "vehicle" LIKE (?)
+                                AND "driver" LIKE (?)
+                                AND "dt" BETWEEN (?) AND (?)
+                                AND "id" > (?)
+                                ORDER BY "id"'''.format(table),
+                                  ("%" + vehicle + "%", "%" + driver + "%", between[0], between[1], int(after_id)))
 
-        items = self.__cursor.fetchall()
+            items = self.__cursor.fetchall()
+        if archived:  # rows in "id" order as in table (archive files are ordered by month)
+            items = sorted(items + archived, key=itemgetter(0))
 
         for row in items:
             yield row
 
+    @locked
+    def route_summary(self, table, vehicle='', driver='', between=None):
+        """Route summary computed by SQLite aggregate query - selected rows are not transferred.
+
+        'Parameters'
+        ------------
+            table (str): table name - 'gps'.
+            vehicle (str, optional): registration number of the vehicle.
+            driver (str, optional): driver name/surname.
+            date_range(list of str, optional): start/end date of route. Format - ["yyyy-mm-dd", "yyyy-mm-dd"].
+                                                Default - None.
+
+        'Returns'
+        ----------
+            dict: 'count', 'vehicle', 'driver' (sorted unique values), 'start_date', 'end_date',
+                  'first_id', 'first_country', 'last_id', 'last_country', 'min_mileage', 'max_mileage'.
+        """
+        search_values_args_validation(vehicle, driver, between)
+
+        aggregates, rows = self.__archived_parts(table, vehicle, driver, between)
+        selection, parameters = self.__selection(self.__archived_sources(table, rows=rows),
+                                                 ('id', 'dt', 'vehicle', 'driver', 'country', 'mileage'),
+                                                 vehicle, driver, between)
+        self.__cursor.execute('''WITH selection AS ({}),
+                            first_last AS (SELECT FIRST_VALUE("country") OVER w AS "first_country",
+                                                  LAST_VALUE("country") OVER w AS "last_country"
+                                           FROM selection
+                                           WINDOW w AS (ORDER BY "id" ROWS BETWEEN UNBOUNDED PRECEDING
+                                                                             AND UNBOUNDED FOLLOWING)
+                                           LIMIT 1)
+                            SELECT COUNT(*), MIN("dt"), MAX("dt"), MIN("id"), MAX("id"),
+                                   (SELECT "first_country" FROM first_last), (SELECT "last_country" FROM first_last),
+                                   MIN("mileage"), MAX("mileage"),
+                                   (SELECT GROUP_CONCAT("vehicle", char(31))
+                                    FROM (SELECT DISTINCT "vehicle" FROM selection)),
+                                   (SELECT GROUP_CONCAT("driver", char(31))
+                                    FROM (SELECT DISTINCT "driver" FROM selection))
+                            FROM selection'''.format(selection), parameters)
+
+        (count, start_date, end_date, first_id, last_id, first_country, last_country, min_mileage, max_mileage,
+         vehicles, drivers) = self.__cursor.fetchone()
+
+        summary = {'count': count,
+                   'vehicle': sorted(vehicles.split(chr(31))) if vehicles else [],
+                   'driver': sorted(drivers.split(chr(31))) if drivers else [],
+                   'start_date': start_date, 'end_date': end_date,
+                   'first_id': first_id, 'first_country': first_country,
+                   'last_id': last_id, 'last_country': last_country,
+                   'min_mileage': min_mileage, 'max_mileage': max_mileage}
+
+        return merge_route_summaries([summary] + [
+            {'count': aggregate['rows'], 'vehicle': [aggregate['vehicle']],
+             'driver': aggregate['drivers'].split(chr(31)) if aggregate['drivers'] else [],
+             'start_date': aggregate['start_date'], 'end_date': aggregate['end_date'],
+             'first_id': aggregate['first_id'], 'first_country': aggregate['first_country'],
+             'last_id': aggregate['last_id'], 'last_country': aggregate['last_country'],
+             'min_mileage': aggregate['min_mileage'], 'max_mileage': aggregate['max_mileage']}
+            for aggregate in aggregates])
+
+    @locked
+    def route_endpoints(self, table, vehicle='', driver='', between=None):
+        """First and last point (by "id") of selection computed by SQLite aggregate query - selected rows
+        are not transferred.
+
+        'Returns'
+        ----------
+            list of tuples: [first row, last row] or [] (no points).
+        """
+        search_values_args_validation(vehicle, driver, between)
+
+        aggregates, rows = self.__archived_parts(table, vehicle, driver, between)
+        sources = self.__archived_sources(table, rows=rows)
+        selection, parameters = self.__selection(sources, ('id',), vehicle, driver, between)
+        points = ' UNION ALL '.join('''SELECT * FROM {} WHERE "id" IN (SELECT "first_id" FROM endpoints
+                                                            UNION SELECT "last_id" FROM endpoints)'''.format(source)
+                                    for source in sources)
+        self.__cursor.execute('''WITH endpoints AS (SELECT MIN("id") AS "first_id", MAX("id") AS "last_id"
+                                              FROM ({}))
+                            {}
+                            ORDER BY "id"'''.format(selection, points), parameters)
+        rows = self.__cursor.fetchall()
+
+        if aggregates:  # endpoints of archived months are stored by archive
+            self.__cursor.execute('''SELECT * FROM {}_archive_points WHERE "id" IN (?, ?)'''.format(table),
+                                  (min(aggregate['first_id'] for aggregate in aggregates),
+                                   max(aggregate['last_id'] for aggregate in aggregates)))
+            rows = sorted(rows + self.__cursor.fetchall(), key=itemgetter(0))
+        return rows[:1] + rows[-1:]  # one point - first and last
+
+    @locked
+    def distance_summary(self, table, vehicle='', driver='', between=None):
+        """Travelled distance per day computed by SQLite window query - selected rows are not transferred.
+
+        Distance to the next point (forward filled mileage) is assigned to the date of the point.
+        Archived months of one vehicle route are joined from aggregates stored by archive.
+
+        'Returns'
+        ----------
+            dict: 'days' ({date: km}), 'first_mileage', 'last_mileage', 'last_date', 'max_mileage'.
+        """
+        search_values_args_validation(vehicle, driver, between)
+
+        aggregates, rows = self.__archived_parts(table, vehicle, driver, between)
+        summary = self.__distance_summary(self.__archived_sources(table, rows=rows), vehicle, driver, between)
+        parts = [summary] if summary['last_date'] is not None else []
+        parts = sorted(parts + [
+            {'days': {date.fromisoformat(day): km for day, km in json.loads(aggregate['days']).items()},
+             'first_mileage': aggregate['first_mileage'], 'last_mileage': aggregate['last_mileage'],
+             'last_date': date.fromisoformat(aggregate['last_date']), 'max_mileage': aggregate['max_mileage'],
+             'first_id': aggregate['first_id'], 'last_id': aggregate['last_id'], 'vehicles': {aggregate['vehicle']}}
+            for aggregate in aggregates], key=itemgetter('first_id'))
+
+        # aggregates are consecutive parts of route of one vehicle only - otherwise archived rows are selected
+        if len(set().union(*[part['vehicles'] for part in parts])) > 1 or \
+                any(part['last_id'] > next_part['first_id'] for part, next_part in zip(parts, parts[1:])):
+            parts = [self.__distance_summary(self.__archived_sources(table, vehicle, driver, between), vehicle,
+                                             driver, between)]
+        summary = join_distance_summaries(parts)
+        return {key: summary[key] for key in ('days', 'first_mileage', 'last_mileage', 'last_date', 'max_mileage')}
+
+    def __distance_summary(self, sources, vehicle, driver, between):
+        """Distance summary of selection from sources (see distance_summary) with 'first_id', 'last_id' and
+        'vehicles' of selection."""
+        selection, parameters = self.__selection(sources, ('id', 'dt', 'vehicle', 'mileage'), vehicle, driver,
+                                                 between)
+        self.__cursor.execute('''WITH selection AS (SELECT *, COUNT("mileage") OVER (ORDER BY "id") AS "filled_group"
+                                                 FROM ({})),
+                            filled AS (SELECT "id", "vehicle", date("dt") AS "date", "filled_group",
+                                              MAX("mileage") OVER (PARTITION BY "filled_group") AS "mileage"
+                                       FROM selection)
+                            SELECT "date", TOTAL("km"), MAX("mileage"),
+                                   MAX("mileage") FILTER (WHERE "filled_group" = 1),
+                                   MAX("mileage") FILTER (WHERE "last"), MAX("last"),
+                                   MIN("id"), MAX("id"), MIN("vehicle"), MAX("vehicle")
+                            FROM (SELECT "id", "vehicle", "date", "mileage", "filled_group",
+                                         LEAD("mileage") OVER (ORDER BY "id") - "mileage" AS "km",
+                                         ROW_NUMBER() OVER (ORDER BY "id" DESC) = 1 AS "last"
+                                  FROM filled)
+                            GROUP BY "date"'''.format(selection), parameters)
+
+        summary = {'days': dict(), 'first_mileage': None, 'last_mileage': None, 'last_date': None,
+                   'max_mileage': None, 'first_id': None, 'last_id': None, 'vehicles': set()}
+        for (day, km, max_mileage, first_mileage, last_mileage, is_last, first_id, last_id, *vehicles) \
+                in self.__cursor.fetchall():
+            day = date.fromisoformat(day)
+            summary['days'][day] = km
+            if max_mileage is not None:
+                summary['max_mileage'] = max(max_mileage, summary['max_mileage'] or max_mileage)
+            if first_mileage is not None:
+                summary['first_mileage'] = first_mileage
+            if is_last:
+                summary['last_date'], summary['last_mileage'] = day, last_mileage
+            summary['first_id'] = min(first_id, summary['first_id'] or first_id)
+            summary['last_id'] = max(last_id, summary['last_id'] or last_id)
+            summary['vehicles'].update(vehicles)
+        return summary
+
+    def daily_distance(self, table, vehicle='', driver='', between=None):
+        """Travelled distance per day in kilometers computed by SQLite (see distance_summary).
+
+        'Returns'
+        ----------
+            pandas.Series
+        """
+        return merge_distance_summaries([self.distance_summary(table, vehicle, driver, between)])
+
+    @locked
+    def search_many(self, table, keys):
+        """Search values for many (vehicle, start date, end date) keys at once - keys are loaded into temporary
+        table and answered with one join using ("vehicle", "dt") index. Vehicle must match exactly.
+
+        'Parameters'
+        ------------
+            table (str): table name - 'gps'.
+            keys (list of tuples): (vehicle, start date, end date) keys. Dates format - "yyyy-mm-dd",
+                                   None - no limit.
+
+        'Returns'
+        ----------
+            dict: {key: {column name: numpy.array}} - selected values of every key as columnar arrays.
+        """
+        search_many_args_validation(keys)
+        keys = list(dict.fromkeys(keys))  # unique keys
+        key_dates = [(vehicle, *self.__between_defaults([start, end])) for vehicle, start, end in keys]
+
+        # archived rows of keys vehicles from months of keys date ranges
+        archived = self.__read_archived(table, between=[min(key[1] for key in key_dates),
+                                                        max(key[2] for key in key_dates)],
+                                        vehicles={vehicle for vehicle, start, end in key_dates}) if keys else []
+        sources = self.__archived_sources(table, rows=archived)
+        in_transaction = self.__connect.in_transaction
+
+        self.__cursor.execute('''CREATE TEMP TABLE IF NOT EXISTS search_keys
+                            ("key_id" INTEGER, "vehicle" TEXT, "start" TEXT, "end" TEXT)''')
+        self.__cursor.execute("DELETE FROM search_keys")
+        self.__cursor.executemany("INSERT INTO search_keys VALUES (?, ?, ?, ?)",
+                                  [(key_id, *key) for key_id, key in enumerate(key_dates)])
+
+        self.__cursor.execute(' UNION ALL '.join('''SELECT search_keys."key_id", points.* FROM search_keys
+                            JOIN {} AS points ON points."vehicle" = search_keys."vehicle"
+                            AND points."dt" BETWEEN search_keys."start" AND search_keys."end"'''.format(source)
+                                                 for source in sources) + ' ORDER BY "key_id", "dt", "id"')
+        col_names = [description[0] for description in self.__cursor.description][1:]
+        data = np.array(self.__cursor.fetchall(), dtype=object).reshape(-1, len(col_names) + 1)
+        if not in_transaction:  # keys inserts must not leave transaction (and table read lock) open
+            self.__connect.commit()
+
+        # rows are ordered by key - split arrays at key boundaries
+        key_ids = data[:, 0].astype('int64')
+        bounds = np.searchsorted(key_ids, np.arange(len(keys) + 1))
+
+        return {key: {col: data[bounds[key_id]:bounds[key_id + 1], index + 1] for index, col in enumerate(col_names)}
+                for key_id, key in enumerate(keys)}
+
+    @locked
+    def search_time_range(self, table, vehicle, start, end):
+        """Indexed ("vehicle", "dt") range seek - points of vehicle between 'start' and 'end' together with
+        neighbouring fixes before and after the range (the nearest ones with speed, mileage and coordinates
+        signal - used for interpolation).
+
+        'Parameters'
+        ------------
+            table (str): table name - 'gps'.
+            vehicle (str): registration number of the vehicle (exact match).
+            start (str): range start. Format - "yyyy-mm-dd hh:mm:ss".
+            end (str): range end. Format - "yyyy-mm-dd hh:mm:ss".
+
+        'Returns'
+        ----------
+            list of tuples: rows in ('dt', 'id') order.
+        """
+        search_values_args_validation(vehicle, '', [start, end])
+
+        # archived rows of vehicle from months of range and from the nearest archived months before/after
+        # range with all signals (row[6] - speed, row[7] - mileage, row[10:12] - coordinates)
+        months = self.archived_months(table)
+        archived = self.__read_archived(table, months=[month for month in months if start[:7] <= month <= end[:7]],
+                                        vehicles={vehicle})
+        for side in (reversed([month for month in months if month < start[:7]]),
+                     [month for month in months if month > end[:7]]):
+            found = set()
+            for month in side:
+                rows = self.__read_archived(table, months=[month], vehicles={vehicle})
+                archived += rows
+                found |= {signal for row in rows for signal, columns in enumerate((row[6:7], row[7:8], row[10:12]))
+                          if None not in columns}
+                if len(found) == 3:
+                    break
+        sources = self.__archived_sources(table, rows=archived)
+
+        signals = ('1', '"speed" IS NOT NULL', '"mileage" IS NOT NULL',
+                   '"longitude" IS NOT NULL AND "latitude" IS NOT NULL')
+        neighbours = ['''SELECT * FROM ({0} ORDER BY "dt" {1}, "id" {1} LIMIT 1)'''.format(' UNION ALL '.join(
+                      '''SELECT * FROM (SELECT * FROM {0} WHERE "vehicle" = :vehicle AND {1} AND {2}
+                                       ORDER BY "dt" {3}, "id" {3} LIMIT 1)'''.format(source, condition, signal, order)
+                      for source in sources), order)
+                      for condition, order in (('"dt" < :start', 'DESC'), ('"dt" > :end', 'ASC'))
+                      for signal in signals]
+        selection = ' UNION '.join('''SELECT * FROM {} WHERE "vehicle" = :vehicle
+                                   AND "dt" BETWEEN :start AND :end'''.format(source) for source in sources)
+
+        self.__cursor.execute('''{0}
+                            UNION {1}
+                            ORDER BY "dt", "id"'''.format(selection, ' UNION '.join(neighbours)),
+                              dict(vehicle=vehicle, start=start, end=end))
+        return self.__cursor.fetchall()
+
+    def search_events(self, table, vehicle='', driver='', between=None, events=None):
+        """Search events (border crossings, ignition/engine transitions) by filter arguments.
+
+        'Parameters'
+        ------------
+            table (str): gps table name - 'gps'.
+            vehicle (str, optional): registration number of the vehicle.
+            driver (str, optional): driver name/surname.
+            date_range(list of str, optional): start/end date of route. Format - ["yyyy-mm-dd", "yyyy-mm-dd"].
+                                                Default - None.
+            events (list of str, optional): events to select e.g. ['entry', 'exit']. Default - None (all events).
+
+        'Yields'
+        ----------
+            generator object - events in 'dt' order.
+        """
+        search_values_args_validation(vehicle, driver, between)
+        events_args_validation(events, EVENTS)
+        between = self.__between_defaults(between)
+        events = events or EVENTS
+
+        with self._lock:
+            self.__cursor.execute('''SELECT * FROM {}_events
+                                where "vehicle" LIKE (?)
+                                AND "driver" LIKE (?)
+                                AND "dt" BETWEEN (?) AND (?)
+                                AND "event" IN ({})
+                                ORDER BY "dt", "id"'''.format(table, ', '.join('?' * len(events))),
+                                  ("%" + vehicle + "%", "%" + driver + "%", between[0], between[1], *events))
+
+            items = self.__cursor.fetchall()
+
+        for row in items:
+            yield row
+
+    @locked
     def find_duplicates(self, table):
 
         self.__cursor.execute('''SELECT *, COUNT(*) from {}
@@ -156,6 +707,7 @@ class DBManager:
 
         return duplicated
 
+    @locked
     def drop_duplicates(self, table):
 
         duplicated = DBManager.find_duplicates(self, table)
@@ -167,27 +719,265 @@ class DBManager:
                             (SELECT MIN(id) id FROM {}
                             GROUP BY dt, position, speed, longitude, latitude)'''.format(table, table))
 
+        if self.has_events(table):
+            self.build_events(table)
+
         print(f'Duplicates dropped - {duplicates_num} rows.')
 
+    @locked
     def drop_table(self, table):
+        for month in self.archived_months(table):
+            if os.path.exists(self.__archive_path(table, month)):  # archive directory may be removed
+                os.remove(self.__archive_path(table, month))
+        self.__cursor.execute("DROP TABLE IF EXISTS temp.{}_archived".format(table))
         self.__cursor.execute("DROP TABLE IF EXISTS {}".format(table))
+        self.__cursor.execute("DROP TABLE IF EXISTS {}_events".format(table))
+        self.__cursor.execute("DROP TABLE IF EXISTS {}_archive".format(table))
+        self.__cursor.execute("DROP TABLE IF EXISTS {}_archive_points".format(table))
+
+    @staticmethod
+    def __archive_dir(database):
+        return os.path.splitext(database)[0] + '_archive'
+
+    def __archive_path(self, table, month):
+        return os.path.join(self.__archive_dir(self.database), f'{table}_{month}.npz')
+
+    def __archive_index(self, table):
+        """Archived months of table {month: last archived id}."""
+        self.__cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?", (table + '_archive',))
+        if self.__cursor.fetchone()[0] == 0:
+            return dict()
+        self.__cursor.execute('''SELECT "month", MAX("last_id") FROM {}_archive GROUP BY "month" ORDER BY "month"'''
+                              .format(table))
+        return dict(self.__cursor.fetchall())
+
+    @locked
+    def archived_months(self, table):
+        """Get archived months of table. Format - "yyyy-mm"."""
+        return list(self.__archive_index(table))
+
+    def __archive_last_id(self, table):
+        return max(self.__archive_index(table).values(), default=0)
+
+    def __read_archived(self, table, vehicle='', driver='', between=None, after_id=0, months=None, vehicles=None):
+        """Archived rows of months from date range (or given 'months') matching filter arguments - months
+        archived up to 'after_id' are not read. 'vehicles' (set of str) - exact vehicles of rows.
+
+            Returns
+            ----------
+            list of tuples: rows in "id" order of every month.
+        """
+        if months is None:
+            between = self.__between_defaults(between)
+            months = [month for month in self.__archive_index(table) if between[0][:7] <= month <= between[1][:7]]
+        selected = [month for month, last_id in self.__archive_index(table).items()
+                    if month in months and last_id > after_id]
+        col_names = self.get_column_names(table) if selected else []
+        return [row for month in selected
+                for row in archive_files.read(self.__archive_path(table, month), col_names, vehicle, driver,
+                                              between, after_id, vehicles)]
+
+    def __archived_parts(self, table, vehicle='', driver='', between=None):
+        """Archived part of selection for summary queries - aggregates of vehicles in archived months (see
+        archive) with all points in date range, and rows of the other vehicles months (or rows selected by
+        driver) filtered before decoding.
+
+            Returns
+            ----------
+            tuple: (list of dicts - aggregates, list of tuples - rows)
+        """
+        if not self.__archive_index(table):
+            return [], []
+        if driver:  # aggregates are stored per vehicle
+            return [], self.__read_archived(table, vehicle, driver, between)
+
+        between = self.__between_defaults(between)
+        self.__cursor.execute('''SELECT * FROM {}_archive WHERE "month" BETWEEN (?) AND (?) AND "vehicle" LIKE (?)
+                              ORDER BY "month"'''.format(table), (between[0][:7], between[1][:7], "%" + vehicle + "%"))
+        col_names = [description[0] for description in self.__cursor.description]
+
+        aggregates, partial = [], dict()
+        for aggregate in [dict(zip(col_names, row)) for row in self.__cursor.fetchall()]:
+            if between[0] <= aggregate['start_date'] and aggregate['end_date'] <= between[1]:
+                aggregates.append(aggregate)
+            else:
+                partial.setdefault(aggregate['month'], set()).add(aggregate['vehicle'])
+
+        rows = [row for month, vehicles in partial.items()
+                for row in self.__read_archived(table, between=between, months=[month], vehicles=vehicles)]
+        return aggregates, rows
 
+    def __archived_sources(self, table, vehicle='', driver='', between=None, rows=None):
+        """Sources of rows for summary and seek queries - table and temporary table (table + '_archived')
+        with archived rows matching filter arguments (or given 'rows') when date range reaches archived months.
+
+            Returns
+            ----------
+            list of str: [table] or [table, temporary table].
+        """
+        rows = self.__read_archived(table, vehicle, driver, between) if rows is None else rows
+        if not rows:
+            return [table]
+
+        in_transaction = self.__connect.in_transaction
+        self.__cursor.execute('''CREATE TEMP TABLE IF NOT EXISTS {0}_archived AS SELECT * FROM {0} LIMIT 0'''
+                              .format(table))
+        self.__cursor.execute('''CREATE INDEX IF NOT EXISTS temp.{0}_archived_vehicle_dt
+                            ON {0}_archived ("vehicle", "dt")'''.format(table))
+        self.__cursor.execute("DELETE FROM temp.{}_archived".format(table))
+        self.__cursor.executemany("INSERT INTO temp.{}_archived VALUES ({})".format(table, ', '.join('?' * len(rows[0]))),
+                                  rows)
+        if not in_transaction:  # temporary rows must not leave transaction (and table read lock) open
+            self.__connect.commit()
+        return [table, 'temp.{}_archived'.format(table)]
+
+    @locked
+    def archive(self, table, until=None):
+        """Moves rows of closed months to compressed, delta-encoded archive files (file per month in database
+        name + '_archive' directory) and vacuums database. Archived rows are still read by search queries
+        (search_values, search_many, search_time_range) and GpsDataReader when date range reaches archived
+        months. Aggregates of every vehicle in archived month (table + '_archive') and its endpoints
+        (table + '_archive_points') are stored for summaries and events of later points.
+
+            Parameters
+            ----------
+                table (str): table name - 'gps'.
+                until (str, optional): first month kept in table. Format - "yyyy-mm".
+                                       Default - None (current month).
+
+            Returns
+            ----------
+            int: number of archived rows.
+        """
+        archive_args_validation(until)
+        until = (until or date.today().strftime("%Y-%m")) + '-01'
+        col_names = self.get_column_names(table)
+
+        os.makedirs(self.__archive_dir(self.database), exist_ok=True)
+        self.__cursor.execute('''CREATE TABLE IF NOT EXISTS {}_archive
+                            (
+                                "month" TEXT NOT NULL,
+                                "vehicle" TEXT,
+                                "rows" INTEGER,
+                                "last_id" INTEGER,
+                                "drivers" TEXT,
+                                "start_date" TIMESTAMP,
+                                "end_date" TIMESTAMP,
+                                "first_id" INTEGER,
+                                "first_country" TEXT,
+                                "last_country" TEXT,
+                                "min_mileage" REAL,
+                                "max_mileage" REAL,
+                                "first_mileage" REAL,
+                                "last_mileage" REAL,
+                                "last_date" TEXT,
+                                "days" TEXT,
+                                PRIMARY KEY("month", "vehicle")
+                            )'''.format(table))
+        self.__cursor.execute('''CREATE TABLE IF NOT EXISTS {0}_archive_points AS SELECT * FROM {0} LIMIT 0'''
+                              .format(table))
+        self.__cursor.execute('''CREATE UNIQUE INDEX IF NOT EXISTS {0}_archive_points_id ON {0}_archive_points ("id")'''
+                              .format(table))
+        self.__cursor.execute('''CREATE INDEX IF NOT EXISTS {0}_archive_points_vehicle_dt
+                            ON {0}_archive_points ("vehicle", "dt")'''.format(table))
+
+        self.__cursor.execute('''SELECT * FROM {} WHERE "dt" < ? ORDER BY "id"'''.format(table), (until,))
+        months = dict()
+        for row in self.__cursor.fetchall():
+            months.setdefault(str(row[1])[:7], []).append(row)  # row[1] - dt
+
+        for month, rows in months.items():
+            path = self.__archive_path(table, month)
+            if os.path.exists(path):  # late rows of archived month - merged (rows archived twice are skipped)
+                ids = {row[0] for row in rows}
+                rows = sorted([row for row in archive_files.read(path, col_names) if row[0] not in ids] + rows)
+            archive_files.write(path, rows, col_names)
+
+            self.__cursor.execute('''DELETE FROM {}_archive WHERE "month" = ?'''.format(table), (month,))
+            self.__cursor.execute('''DELETE FROM {}_archive_points WHERE substr("dt", 1, 7) = ?'''.format(table),
+                                  (month,))
+            for summary in archive_files.summarize(rows, col_names):
+                self.__cursor.execute('''INSERT INTO {}_archive VALUES (:month, :vehicle, :rows, :last_id, :drivers,
+                                    :start_date, :end_date, :first_id, :first_country, :last_country,
+                                    :min_mileage, :max_mileage, :first_mileage, :last_mileage, :last_date,
+                                    :days)'''.format(table),
+                                      dict(summary, month=month, drivers=chr(31).join(summary['drivers']),
+                                           days=json.dumps(summary['days'])))
+                self.__cursor.executemany("INSERT INTO {}_archive_points VALUES ({})"
+                                          .format(table, ', '.join('?' * len(col_names))), summary['points'])
+
+        self.__cursor.execute('''DELETE FROM {} WHERE "dt" < ?'''.format(table), (until,))
+        if self.__connect.in_transaction:
+            self.__cursor.execute("commit")
+        self.__cursor.execute("VACUUM")
+
+        archived = sum(len(rows) for rows in months.values())
+        print(f'{archived} rows archived.')
+        return archived
+
+    @locked
     def table_length(self, table):
         self.__cursor.execute("SELECT COUNT(*) FROM {}".format(table))
         length = self.__cursor.fetchone()[0]
         return length
 
+    @locked
+    def last_id(self, table):
+        self.__cursor.execute("SELECT MAX(id) FROM {}".format(table))
+        last_id = self.__cursor.fetchone()[0]
+        return max(last_id or 0, self.__archive_last_id(table))
+
+    @locked
     def total_changes(self):
         print(self.__connect.total_changes)
 
+    @locked
     def get_column_names(self, table):
-        self.__cursor.execute("SELECT * from {}".format(table))
+        self.__cursor.execute("SELECT * from {} LIMIT 0".format(table))
         col_names = [description[0] for description in self.__cursor.description]
         return col_names
 
+    def __selection(self, sources, columns, vehicle, driver, between):
+        """Selection query of gps table (and archived rows - see __archived_sources) reading only 'columns'
+        (and its parameters) for summary queries.
+
+        Vehicles containing 'vehicle' are found by ("vehicle", "dt") index skip-scan (distinct vehicles),
+        so rows are read by exact vehicle seeks instead of full table scan. Without vehicle rows are
+        read by "dt" index.
+        """
+        between = self.__between_defaults(between)
+        vehicle_seek = '''"vehicle" IN (WITH RECURSIVE vehicles("vehicle") AS
+                                           (SELECT MIN("vehicle") FROM {0}
+                                            UNION ALL
+                                            SELECT (SELECT MIN("vehicle") FROM {0} WHERE "vehicle" > vehicles."vehicle")
+                                            FROM vehicles WHERE vehicles."vehicle" IS NOT NULL)
+                                       SELECT "vehicle" FROM vehicles WHERE "vehicle" LIKE :vehicle) AND
+                       '''.format(sources[0]) if vehicle else ''
+        selection = ' UNION ALL '.join('''SELECT {1} FROM {0}
+                       WHERE {2}"vehicle" LIKE :vehicle
+                       AND "driver" LIKE :driver
+                       AND "dt" BETWEEN :start AND :end'''.format(source, ', '.join(f'"{col}"' for col in columns),
+                                                                  vehicle_seek if source == sources[0] else '')
+                                       for source in sources)
+        return selection, {'vehicle': "%" + vehicle + "%", 'driver': "%" + driver + "%",
+                           'start': between[0], 'end': between[1]}
+
+    @staticmethod
+    def __between_defaults(between):
+        """Fills missing start/end date of 'between' argument (copy)."""
+        if bool(between) is False:
+            between = ['2000-01-01', date.today().strftime("%Y-%m-%d 23:59:59")]
+        between = list(between)
+        if bool(between[0]) is False:
+            between[0] = '2000-01-01'
+        if bool(between[1]) is False:
+            between[1] = date.today().strftime("%Y-%m-%d 23:59:59")
+        return between
+
     @staticmethod
     def delete_database(database):
         os.remove(database)
+        shutil.rmtree(DBManager.__archive_dir(database), ignore_errors=True)
         print(f'{str(database)} deleted succesfully.')
 
     @staticmethod
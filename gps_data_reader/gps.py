@@ -1,9 +1,8 @@
-from gps_data_reader.db_manager import DBManager
-import folium
+import threading
+from gps_data_reader.db_manager import DBManager, locked
+from gps_data_reader.time_index import TimeIndex
 import numpy as np
 import pandas as pd
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
 
 
 class GpsDataReader:
@@ -16,143 +15,174 @@ class GpsDataReader:
             driver (str, optional): driver name/surname.
             date_range(list of str, optional): start/end date of route. Format - ["yyyy-mm-dd", "yyyy-mm-dd"].
                                                Default - None.
+            database (DBManager or ShardedDBManager, optional): database instance. Default - None
+                                                                 (DBManager of company + ".db").
+            push_down (bool, optional): True - summary methods (route_info, daily_distance, crossing_borders)
+                                        are computed by database and points are not loaded. Default - False.
     """
 
-    def __init__(self, company, vehicle='', driver='', date_range=None):
+    def __init__(self, company, vehicle='', driver='', date_range=None, database=None, push_down=False):
         self._company = company
-        self.__database = DBManager(database=company + ".db")
+        self._lock = threading.RLock()  # selection is updated by LiveIngestor thread
+        self.__database = DBManager(database=company + ".db") if database is None else database
+        self.__push_down = push_down
         self._gps_data = GpsDataReader.__gps_data_setter(self, vehicle=vehicle, driver=driver, date_range=date_range)
 
     def __repr__(self):
         return f"{type(self).__name__} - ({self.company})"
 
     def __gps_data_setter(self, vehicle, driver, date_range):
+        # incremental state - boundries and daily distance are computed on demand
+        self.__filter = dict(vehicle=vehicle, driver=driver, between=date_range)
+        self.__boundries = None
+        self.__daily_km = None
+        self.__time_index = None
+
+        if self.__push_down:
+            return None  # points stay in database
+
         if any((vehicle, driver, date_range)):
             data_gen = self.__database.search_values(table='gps', vehicle=vehicle, driver=driver, between=date_range)
-            data = self.__database.generator_converter(data_gen)
-            col_names = self.__database.get_column_names('gps')
-
-            gps_data = dict()
-            for index, col in enumerate(col_names):
-                gps_data[col] = data[:, index]
-            return gps_data
+            return self.__to_columns(data_gen)
 
         else:
             print('No data selected.')
 
+    def __to_columns(self, data_gen):
+        data = self.__database.generator_converter(data_gen)
+        col_names = self.__database.get_column_names('gps')
+
+        gps_data = dict()
+        for index, col in enumerate(col_names):
+            gps_data[col] = data[:, index] if len(data) else np.array([], dtype=object)
+        return gps_data
+
     def __is_data_selected(self):
+        if self.__push_down:
+            raise Exception('Points are not loaded in push-down mode.')
         if self._gps_data is None:
             raise Exception('No data selected.')
 
-    def __set_boundries(self):
-
+    @staticmethod
+    def __boundries_labels(country_np):
+        """Label points as 'start', 'entry', 'exit', 'end' or NaN (no border crossing)."""
+        aux_np = np.full(len(country_np), np.nan, dtype=object)
+        if len(country_np) == 0:
+            return aux_np
+
+        changed = country_np[1:] != country_np[:-1]  # country differs from previous point
+        aux_np[1:][changed] = 'entry'
+        aux_np[:-1][changed & (aux_np[:-1] != 'entry')] = 'exit'
+
+        aux_np[0], aux_np[-1] = 'start', 'end'  # add start/end point
+        return aux_np
+
+    @staticmethod
+    def __boundries_details(country_np, labels):
+        """Country of previous point for 'entry', of next point for 'exit' labels (None for other points)."""
+        labels = np.array(labels, dtype=object)
+        detail_np = np.full(len(country_np), None, dtype=object)
+        detail_np[1:][labels[1:] == 'entry'] = country_np[:-1][labels[1:] == 'entry']
+        detail_np[:-1][labels[:-1] == 'exit'] = country_np[1:][labels[:-1] == 'exit']
+        return detail_np
+
+    def __set_boundries(self, from_index=0):
+        """Boundries labels of points from 'from_index' to the end (previous point is used as context)."""
         country_np = self._gps_data['country']
-        aux_list = ['start']  # add start point
-
-        for index, country in enumerate(country_np):
-            index += 1
-            try:
-                if country_np[index] != country_np[index - 1]:
-                    aux_list.append('entry')
-                elif country_np[index] != country_np[index + 1]:
-                    aux_list.append('exit')
-                else:
-                    aux_list.append(np.NaN)
-            except IndexError:
-                break
-
-        aux_list.append('end')  # add end point
-        return aux_list
-
-    def __get_coordinates(self):
+        context_index = max(from_index - 1, 0)
+
+        aux_np = self.__boundries_labels(country_np[context_index:])
+        return list(aux_np[from_index - context_index:])
+
+    def __get_events_boundries(self, columns):
+        """Crossing borders points {point id: (label, detail, values of columns)} read from database events table
+        and start/end points of selection - selected points are not scanned.
+
+            Returns
+            ----------
+            tuple: (boundries, list of point ids - start point first, end point last)
+        """
+        start_end_data = self._get_start_end_data()
+        boundries = dict()
+        for event in self.__database.search_events(table='gps', events=['exit', 'entry'], **self.__filter):
+            if boundries.get(event[1], ('',))[0] != 'entry':  # point with entry and exit is an entry
+                # event[1] - point id, event[7] - event name, event[8] - detail (previous/next country)
+                values = dict(zip(('dt', 'vehicle', 'driver', 'position', 'country'), event[2:7]),
+                              longitude=event[9], latitude=event[10])
+                boundries[event[1]] = (event[7], event[8], [values[col] for col in columns])
+
+        endpoints = [int(point_id) for point_id in start_end_data['id']]
+        for index, label in enumerate(['start', 'end'][:len(endpoints)]):
+            boundries[endpoints[index]] = (label, None, [start_end_data[col][index] for col in columns])
+        order = list(dict.fromkeys(endpoints[:1] + sorted(set(boundries) - set(endpoints)) + endpoints[1:]))
+        return boundries, order
+
+    def __update_daily_km(self, from_index=0):
+        """Adds distance travelled from 'from_index' point (and the previous one) to daily totals."""
+        if from_index == 0:
+            self.__daily_km = {'km': dict(), 'mileage': np.nan, 'max': np.nan, 'last_date': None}
+        daily_km = self.__daily_km
+        context_index = max(from_index - 1, 0)
+
+        mileage = pd.Series(self._gps_data['mileage'][context_index:], dtype='float64')
+        if from_index > 0:
+            mileage.iloc[0] = daily_km['mileage']  # last filled mileage of previous selection
+        mileage = mileage.ffill()
+        dates = pd.to_datetime(pd.Series(self._gps_data['dt'][context_index:])).dt.date
+
+        # distance to the next point is assigned to the date of the point
+        km_per_point = mileage.diff().shift(-1).iloc[:-1]
+        for day, km in km_per_point.groupby(dates.iloc[:-1].values).sum().items():
+            daily_km['km'][day] = daily_km['km'].get(day, 0) + km
+
+        daily_km['mileage'] = mileage.iloc[-1]
+        daily_km['max'] = np.nanmax([daily_km['max'], mileage.max()])
+        daily_km['last_date'] = dates.iloc[-1]
+
+    def __append(self, new_data):
+        from_index = len(self._gps_data['id'])
+        if len(new_data['id']) == 0:
+            return 0
+
+        # new dict - gps_data taken by other thread stays consistent
+        self._gps_data = {col: np.concatenate((values, new_data[col])) for col, values in self._gps_data.items()}
+
+        # previous end point must be relabeled, other boundries stay untouched
+        if self.__boundries is not None:
+            relabel_index = max(from_index - 1, 0)
+            self.__boundries = self.__boundries[:relabel_index] + self.__set_boundries(relabel_index)
+        if self.__daily_km is not None:
+            self.__update_daily_km(from_index)
+        self.__time_index = None  # rebuilt on demand
+
+        return len(new_data['id'])
+
+    def _get_coordinates(self):
+        self.__is_data_selected()
         coordinates = ((x, y) for x, y in zip(self._gps_data['latitude'], self._gps_data['longitude']))
         return coordinates
 
-    def __get_start_end_coordinates(self):
-        coordinates = list(self.__get_coordinates())
-        start, end = (coordinates[0][0], coordinates[0][1]), (coordinates[-1][0], coordinates[-1][1])
+    def _get_start_end_coordinates(self):
+        start_end_data = self._get_start_end_data()
+        start, end = [(latitude, longitude) for latitude, longitude
+                      in zip(start_end_data['latitude'], start_end_data['longitude'])]
         return start, end
 
-    def __get_start_end_data(self):
+    def _get_start_end_data(self):
+        """First/last point values {column name: [first, last]} (aggregate query in push-down mode)."""
+        if self.__push_down:
+            endpoints = self.__database.route_endpoints('gps', **self.__filter)
+            return {col: [row[index] for row in endpoints]
+                    for index, col in enumerate(self.__database.get_column_names('gps'))}
+
+        self.__is_data_selected()
+        if len(self._gps_data['id']) == 0:
+            return {i: [] for i in self._gps_data.keys()}
         start_end_data = {i: [self._gps_data[i][0], self._gps_data[i][-1]] for i in self._gps_data.keys()}
         return start_end_data
 
-    def __add_start_end_points_to_map(self, route_map):
-        coordinates = list(self.__get_coordinates())
-
-        # coords for start end points
-        start, end = self.__get_start_end_coordinates()
-
-        # start/end points data
-        start_end_data = pd.DataFrame(self.__get_start_end_data())
-        first_iloc = start_end_data.iloc[0]
-        last_iloc = start_end_data.iloc[-1]
-
-        # string block to display after click POPUP
-        start_popup = folium.Popup(
-            f"START POINT<br>dt: {first_iloc['dt']}<br>vehicle: {first_iloc['vehicle']}<br>"
-            f"driver: {first_iloc['driver']}<br>position: {first_iloc['position']}<br>"
-            f"country: {first_iloc['country']}<br>speed: {first_iloc['speed']}<br>"
-            f"mileage: {first_iloc['mileage']}",
-            max_width=900)
-
-        end_popup = popup = folium.Popup(
-            f"END POINT<br>dt: {last_iloc['dt']}<br>vehicle: {last_iloc['vehicle']}<br>"
-            f"driver: {last_iloc['driver']}<br>position: {last_iloc['position']}<br>"
-            f"country: {last_iloc['country']}<br>speed: {last_iloc['speed']}<br>"
-            f"mileage: {last_iloc['mileage']}",
-            max_width=900)
-
-        # string block to display TOOLTIP
-        start_tooltip = f" {first_iloc['dt']};\n {first_iloc['vehicle']}; {first_iloc['position']}," \
-                        f"{first_iloc['country']}"
-        end_tooltip = f"{last_iloc['dt']};\n {last_iloc['vehicle']}; {last_iloc['position']}; {last_iloc['country']}"
-
-        # add points to the map
-        # start point
-        folium.Marker(start, icon=folium.Icon(color='black', icon='play', prefix='fa', max_width=900),
-                      popup=start_popup, tooltip=start_tooltip).add_to(route_map)
-        # end point
-        folium.Marker(end, icon=folium.Icon(color='black', icon='flag-checkered', prefix='fa'), popup=end_popup,
-                      tooltip=end_tooltip).add_to(route_map)
-
-    def __add_crossing_borders_to_map(self, route_map):
-
-        cross_df = self.crossing_borders()
-        index_filter = cross_df.index
-
-        # crossing borders coords
-        coordinates = list(self.__get_coordinates())
-        cross_coordinates = [coordinates[i] for i in index_filter]
-
-        # border crossing points
-        for i in range(1, len(cross_df) - 1):  # range skip start and end points
-
-            # popup and toolip string blocks
-            from_condition = cross_df.iloc[i - 1]['country'] if i % 2 == 0 else cross_df.iloc[i]['country']
-            to_condition = cross_df.iloc[i]['country'] if i % 2 == 0 else cross_df.iloc[i + 1]['country']
-
-            i_popup = folium.Popup(f"dt: {cross_df.iloc[i]['dt']}<br>vehicle: {cross_df.iloc[i]['vehicle']}<br>"
-                                   f"driver: {cross_df.iloc[i]['driver']}<br>position: {cross_df.iloc[i]['position']}"
-                                   f"<br>country: {cross_df.iloc[i]['country']}<br>"
-                                   f"Occurence: From {from_condition} To {to_condition}",
-                                   max_width=900)
-
-            i_tooltip = f"{cross_df.iloc[i]['dt']};\n {cross_df.iloc[i]['vehicle']}; " \
-                        f"{cross_df.iloc[i]['position']}, {cross_df.iloc[i]['country']}"
-
-            # entry points
-            if i % 2 == 0:
-                folium.Marker(cross_coordinates[i],
-                              icon=folium.Icon(color='green', icon='sign-in', prefix='fa', max_width=900),
-                              popup=i_popup, tooltip=i_tooltip).add_to(route_map)
-            # exit points
-            else:
-                folium.Marker(cross_coordinates[i],
-                              icon=folium.Icon(color='red', icon='sign-out', prefix='fa', max_width=900),
-                              popup=i_popup, tooltip=i_tooltip).add_to(route_map)
-
-    def __get_df_for_diagrams(self):
+    def _get_df_for_diagrams(self):
+        self.__is_data_selected()
         gps_data = self._gps_data.copy()
         df = pd.DataFrame(data={'dt': gps_data['dt'],
                                 'speed': gps_data['speed'],
@@ -160,12 +190,12 @@ class GpsDataReader:
                                 })
         # convert types
         df = df.astype(dtype={'speed': 'float64', 'mileage': 'float64'})
-        df['dt'] = pd.to_datetime(df['dt'], dayfirst=True)
+        df['dt'] = pd.to_datetime(df['dt'])
         df['date'] = df['dt'].dt.date
 
         # fill Nan
-        df['speed'].fillna(0, inplace=True)
-        df['mileage'].fillna(method='ffill', inplace=True)
+        df['speed'] = df['speed'].fillna(0)
+        df['mileage'] = df['mileage'].ffill()
         return df
 
     @property
@@ -178,6 +208,7 @@ class GpsDataReader:
         """Get company atrribute."""
         return self._company
 
+    @locked
     def data_filter(self, vehicle="", driver="", date_range=None):
         """Select data to display.
 
@@ -191,27 +222,82 @@ class GpsDataReader:
         """
         del self._gps_data
         self._gps_data = GpsDataReader.__gps_data_setter(self, vehicle, driver, date_range)
-        print(f"{len(self._gps_data['id'])} rows selected.")
+        if self.__push_down:
+            print(f"{self.__database.route_summary('gps', **self.__filter)['count']} rows selected.")
+        else:
+            print(f"{len(self._gps_data['id'])} rows selected.")
+
+    @locked
+    def update(self):
+        """ Appends points added to database since the last selection/update (live ingestion).
+
+            Selected data arrays are extended with new points only - crossing borders state,
+            daily distance and start/end information are updated without re-reading selected history.
 
+            Returns
+            ----------
+            int: number of appended points.
+        """
+        self.__is_data_selected()
+        ids = self._gps_data['id']
+        last_id = ids.astype('int64').max() if len(ids) else 0
+
+        data_gen = self.__database.search_values(table='gps', after_id=last_id, **self.__filter)
+        return self.__append(self.__to_columns(data_gen))
+
+    @locked
+    def daily_distance(self):
+        """ Travelled distance per day in kilometers (window query in push-down mode).
+
+            Returns
+            ----------
+            pandas.Series
+        """
+        if self.__push_down:
+            return self.__database.daily_distance('gps', **self.__filter)
+
+        self.__is_data_selected()
+        if self.__daily_km is None:
+            self.__update_daily_km()
+
+        daily_km = dict(self.__daily_km['km'])
+        if self.__daily_km['last_date'] is not None:
+            last_date = self.__daily_km['last_date']
+            daily_km[last_date] = daily_km.get(last_date, 0) + self.__daily_km['max'] - self.__daily_km['mileage']
+
+        return pd.Series(daily_km, name='km', dtype='float64').sort_index()
+
+    @locked
     def route_info(self):
-        """ Extracts summary information about the route from selected data.
+        """ Extracts summary information about the route from selected data
+            (aggregate query in push-down mode).
 
             Returns
             ----------
             pandas.DataFrame
         """
-        self.__is_data_selected()
-        gps_data = self._gps_data.copy()
+        if self.__push_down:
+            summary = self.__database.route_summary('gps', **self.__filter)
+
+            vehicle, driver = summary['vehicle'], summary['driver']
+            start_end_date = summary['start_date'], summary['end_date']
+            start_end_country = [summary['first_country'], summary['last_country']]
+            start_end_mileage = summary['min_mileage'], summary['max_mileage']
+            distance = None if summary['max_mileage'] is None else summary['max_mileage'] - summary['min_mileage']
+
+        else:
+            self.__is_data_selected()
+            gps_data = self._gps_data.copy()
 
-        vehicle = np.unique(gps_data['vehicle']).tolist()
-        driver = np.unique(gps_data['driver']).tolist()
-        start_end_date = gps_data['dt'].min(), gps_data['dt'].max()
-        start_end_country = [gps_data['country'][0], gps_data['country'][len(gps_data['country']) - 1]]
+            vehicle = np.unique(gps_data['vehicle']).tolist()
+            driver = np.unique(gps_data['driver']).tolist()
+            start_end_date = gps_data['dt'].min(), gps_data['dt'].max()
+            start_end_country = [gps_data['country'][0], gps_data['country'][len(gps_data['country']) - 1]]
 
-        mileage = pd.Series(gps_data['mileage'])
-        start_end_mileage = mileage.min(), mileage.max()
+            mileage = pd.Series(gps_data['mileage'])
+            start_end_mileage = mileage.min(), mileage.max()
 
-        distance = mileage.max() - mileage.min()
+            distance = mileage.max() - mileage.min()
 
         route_info = pd.DataFrame(data={self._company: [vehicle, driver, start_end_date, start_end_country,
                                                         start_end_mileage, distance]},
@@ -219,68 +305,85 @@ class GpsDataReader:
                                          'start/end mileage', 'distance(km)'])
         return route_info
 
+    @locked
     def crossing_borders(self):
         """ Selects points and detailed information about border crossing.
+            Points are read from database events table when database has events (also in push-down mode).
 
             Returns
             ----------
-            pandas.DataFrame
+            pandas.DataFrame: index - point id, 'borders' - 'start', 'entry', 'exit' or 'end' (start point
+                              first, end point last), 'detail' - country of previous (entry) or next (exit) point.
         """
-        aux_list = self.__set_boundries()
-        gps_df = pd.DataFrame(data={'dt': self._gps_data['dt'],
-                                    'vehicle': self._gps_data['vehicle'],
-                                    'driver': self._gps_data['driver'],
-                                    'position': self._gps_data['position'],
-                                    'country': self._gps_data['country']})
+        columns = ['dt', 'vehicle', 'driver', 'position', 'country', 'longitude', 'latitude']
+        if self.__database.has_events('gps'):
+            boundries, index = self.__get_events_boundries(columns)
+            crossing_borders_df = pd.DataFrame(data=[boundries[i][2] for i in index], columns=columns,
+                                               index=pd.Index(index, dtype='int64', name='id'))
+            crossing_borders_df['borders'] = [boundries[i][0] for i in index]
+            crossing_borders_df['detail'] = [boundries[i][1] for i in index]
+            return crossing_borders_df
+
+        self.__is_data_selected()
+        if self.__boundries is None:
+            self.__boundries = self.__set_boundries()
+        aux_list = self.__boundries
+        gps_df = pd.DataFrame(data={col: self._gps_data[col] for col in columns},
+                              index=pd.Index(self._gps_data['id'].astype('int64'), name='id'))
         gps_df['borders'] = aux_list
+        gps_df['detail'] = self.__boundries_details(self._gps_data['country'], aux_list)
         crossing_borders_df = gps_df[~gps_df['borders'].isnull()]
         return crossing_borders_df
 
-    def route_map(self, crossing_broders=False):
-        """ Displays gps trace signal map with start/end points.
+    @locked
+    def position_at(self, timestamps, vehicle=None, method='interpolate'):
+        """ Vehicle position, speed and mileage at given moments (e.g. delivery time).
+            Points are read by indexed range seek in push-down mode.
 
             Parameters
             ----------
-            crossing_borders (bool): True - to add crossing borders points.
+            timestamps (str or list): moments to resolve. Format - "yyyy-mm-dd hh:mm:ss".
+            vehicle (str, optional): registration number of the vehicle. Default - None (selected vehicle).
+            method (str, optional): 'interpolate' or 'nearest' (fix). Default - 'interpolate'.
 
             Returns
             ----------
-            folium.Map: route path map.
+            pandas.DataFrame (see TimeIndex.position)
         """
-        gps = pd.DataFrame(self._gps_data.copy())
-        gps.drop('id', axis=1, inplace=True)
-
-        coordinates = list(self.__get_coordinates())
-
-        # start location point
-        start_location = (coordinates[0][0], coordinates[0][1])
+        if self.__push_down:
+            if vehicle is None:
+                vehicles = self.__database.route_summary('gps', **self.__filter)['vehicle']
+                if len(vehicles) != 1:
+                    raise Exception('Selected data contains several vehicles - vehicle argument is required.')
+                vehicle = vehicles[0]
+            return TimeIndex.from_database(self.__database, vehicle, timestamps).position(vehicle, timestamps, method)
 
-        route_map = folium.Map(location=start_location, zoom_start=6)
+        self.__is_data_selected()
+        if self.__time_index is None:
+            self.__time_index = TimeIndex(self._gps_data)
 
-        i = 0
-        for coords in coordinates:
-            popup = folium.Popup(
-                f"dt: {gps.iloc[i]['dt']}<br>vehicle: {gps.iloc[i]['vehicle']}<br>"
-                f"driver: {gps.iloc[i]['driver']}<br>position: {gps.iloc[i]['position']}<br>"
-                f"country: {gps.iloc[i]['country']}<br>speed: {gps.iloc[i]['speed']}<br>"
-                f"mileage: {gps.iloc[i]['mileage']}",
-                max_width=900)
-            folium.CircleMarker(location=coords,
-                                popup=popup,
-                                tooltip=f"{gps.iloc[i]['dt']};\n {gps.iloc[i]['vehicle']}; "
-                                        f"{gps.iloc[i]['position']}, {gps.iloc[i]['country']}",
-                                radius=2, weight=4,
-                                color='#6495ED',
-                                bubblingMouseEvents=False, ).add_to(route_map)
-            i += 1
+        if vehicle is None:
+            if len(self.__time_index.vehicles) != 1:
+                raise Exception('Selected data contains several vehicles - vehicle argument is required.')
+            vehicle = self.__time_index.vehicles[0]
+        return self.__time_index.position(vehicle, timestamps, method)
 
-        self.__add_start_end_points_to_map(route_map=route_map)
+    @locked
+    def route_map(self, crossing_broders=False):
+        """ Displays gps trace signal map with start/end points.
 
-        if crossing_broders:
-            self.__add_crossing_borders_to_map(route_map)
+            Parameters
+            ----------
+            crossing_borders (bool): True - to add crossing borders points.
 
-        return route_map
+            Returns
+            ----------
+            folium.Map: route path map.
+        """
+        from gps_data_reader import visualization  # folium loaded on demand
+        return visualization.route_map(self, crossing_broders)
 
+    @locked
     def crossing_borders_map(self):
         """ Displays map with crossing borders points.
 
@@ -288,71 +391,35 @@ class GpsDataReader:
             ----------
             folium.Map
         """
-        coordinates = list(self.__get_coordinates())
-        start_location = self.__get_start_end_coordinates()[0]
-
-        route_map = folium.Map(location=start_location, zoom_start=6)
-        self.__add_start_end_points_to_map(route_map)
-        self.__add_crossing_borders_to_map(route_map)
-        return route_map
+        from gps_data_reader import visualization
+        return visualization.crossing_borders_map(self)
 
-    def distance_diagram(self):
+    @locked
+    def distance_diagram(self, show=True):
         """ Displays travelled distance per day in kilometers.
 
+            Parameters
+            ----------
+            show (bool): False - figure is only returned (e.g. to save it to file).
+
             Returns
             ----------
             plotly.graph_object: plotly figure.
         """
-        distance_df = self.__get_df_for_diagrams()
-
-        def km_per_point(df):
-            aux_list = []
-            for i in range(0, len(df['mileage'])):
-                if i == len(df['mileage']) - 1:
-                    aux_list.append(df['mileage'].max() - df['mileage'].iloc[i])
-                else:
-                    aux_list.append(df['mileage'].iloc[i + 1] - df['mileage'].iloc[i])
-            return aux_list
-
-        # distance - per point, cumsum, grouped by day
-        km_per_point_list = km_per_point(distance_df)
-        distance_df['km'] = km_per_point_list
-        distance_df['km_cumsum'] = distance_df['km'].cumsum()
-        date_grouped = distance_df.groupby('date')['km'].sum()
-
-        # prepare plot
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
-        fig.add_trace(go.Bar(x=date_grouped.index, y=date_grouped, name='km/day'))
-
-        fig.add_trace(go.Scatter(x=distance_df['dt'], y=distance_df['km_cumsum'], name='km'), secondary_y=True)
-
-        fig.update_layout(title_text='KM diagram', width=1000,
-                          xaxis=dict(
-                              tickmode='linear'))
+        from gps_data_reader import visualization  # plotly loaded on demand
+        return visualization.distance_diagram(self, show)
 
-        fig.update_yaxes(title_text="km", secondary_y=False)
-        fig.update_yaxes(title_text="km cumsum", secondary_y=True)
-
-        fig.show()
-
-    def speed_diagram(self):
+    @locked
+    def speed_diagram(self, show=True):
         """ Displays vehicle speed trace and daily average speed.
 
+            Parameters
+            ----------
+            show (bool): False - figure is only returned (e.g. to save it to file).
+
             Returns
             ----------
             plotly.graph_object: plotly figure.
         """
-        speed_df = self.__get_df_for_diagrams()
-
-        fig = go.Figure(layout=go.Layout(yaxis=dict(range=[0, 100])))
-
-        fig.add_trace(go.Scatter(x=speed_df['dt'], y=speed_df['speed'], name='speed (km/h)'))
-
-        fig.add_trace(go.Scatter(x=speed_df.groupby('date').agg('mean')['speed'].index,
-                                 y=speed_df.groupby('date').agg('mean')['speed'],
-                                 name='day mean'))
-
-        fig.update_layout(title_text='Speed diagram', width=1000, yaxis_title='km/h',
-                          xaxis=dict(
-                              tickmode='linear'))
-        fig.show()
+        from gps_data_reader import visualization
+        return visualization.speed_diagram(self, show)
@@ -0,0 +1,190 @@
+import os
+import socket
+import time
+from datetime import datetime
+from gps_data_reader.db_manager import DBManager
+
+
+class LiveIngestor:
+    """Live ingestion of gps signals - follows growing device export file (or local socket) and commits
+    new points to database in micro-batches.
+
+        Each line of the source is one gps point with values in 'gps' table columns order (without id):
+            "dt", "vehicle", "driver", "position", "country", "speed", "mileage",
+            "ignition_status", "engine_status", "longitude", "latitude".
+
+        'Attributes'
+        ------------
+            database (str, DBManager or ShardedDBManager): name/path of database or database instance.
+            table (str, optional): table name. Default - 'gps'.
+            batch_size (int, optional): maximum number of points committed at once. Default - 500.
+            max_latency (float, optional): maximum time (seconds) point waits in buffer for commit. Default - 1.0.
+            delimiter (str, optional): values delimiter. Default - ';'.
+    """
+
+    def __init__(self, database, table='gps', batch_size=500, max_latency=1.0, delimiter=';'):
+        self.database = DBManager(database) if isinstance(database, str) else database
+        self.table = table
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.delimiter = delimiter
+
+        self.rows_added = 0
+        self.rows_rejected = 0
+        self.update_errors = []  # (reader, error) of failed reader updates
+        self.__buffer = []
+        self.__buffer_since = None
+        self.__readers = []
+        self.__running = False
+
+    def __repr__(self):
+        return f"{type(self).__name__} - ({self.database.database})"
+
+    @staticmethod
+    def __to_float(value):
+        return None if value in ('', '-', 'None', 'nan') else float(value)
+
+    @staticmethod
+    def __to_status(value):
+        return 1 if value.lower() in ('1', 'true') else 0
+
+    def parse_line(self, line):
+        """Convert source line to 'gps' table row (tuple). Raises ValueError for invalid line."""
+        values = [value.strip() for value in line.strip().split(self.delimiter)]
+        if len(values) != 11:
+            raise ValueError(f"Expected 11 values, got {len(values)}.")
+
+        dt, vehicle, driver, position, country, speed, mileage, ignition, engine, longitude, latitude = values
+        dt = datetime.fromisoformat(dt).strftime("%Y-%m-%d %H:%M:%S")
+
+        return (dt, vehicle, driver, position, country, self.__to_float(speed), self.__to_float(mileage),
+                self.__to_status(ignition), self.__to_status(engine), float(longitude), float(latitude))
+
+    def subscribe(self, reader):
+        """Register GpsDataReader instance - its selection is updated after every commit."""
+        self.__readers.append(reader)
+
+    def unsubscribe(self, reader):
+        self.__readers.remove(reader)
+
+    def push(self, line):
+        """Add source line to buffer. Buffer is committed when batch size or latency limit is reached."""
+        try:
+            row = self.parse_line(line)
+        except ValueError:
+            self.rows_rejected += 1  # header, partial or corrupted line
+        else:
+            if not self.__buffer:
+                self.__buffer_since = time.monotonic()
+            self.__buffer.append(row)
+
+        if len(self.__buffer) >= self.batch_size:
+            self.flush()
+        else:
+            self.__flush_if_late()
+
+    def __flush_if_late(self):
+        if self.__buffer and time.monotonic() - self.__buffer_since >= self.max_latency:
+            self.flush()
+
+    def flush(self):
+        """Commit buffered points and update subscribed readers. Points stay in buffer when insert or commit
+        fails (the error is raised). Failed reader updates do not stop updates of other readers - they are
+        collected in 'update_errors'.
+
+            Returns
+            ----------
+            int: number of committed points.
+        """
+        if not self.__buffer:
+            return 0
+
+        rows = self.__buffer
+        try:
+            self.database.insert_values(self.table, rows)
+            self.database.commit()
+        except Exception:
+            self.database.rollback()
+            raise
+        self.__buffer = []
+        self.rows_added += len(rows)
+
+        for reader in self.__readers:
+            try:
+                reader.update()
+            except Exception as error:  # e.g. push-down reader
+                self.update_errors.append((reader, error))
+        return len(rows)
+
+    def stop(self):
+        """Stop following the source (remaining points are committed)."""
+        self.__running = False
+
+    def follow_file(self, path, from_start=False, poll_interval=0.2, duration=None):
+        """Follow growing export file and commit new lines in micro-batches (similar to 'tail -f').
+
+            Parameters
+            ----------
+                path (str): export file path.
+                from_start (bool, optional): True - ingest existing file content first. Default - False.
+                poll_interval (float, optional): waiting time (seconds) for new lines. Default - 0.2.
+                duration (float, optional): stop following after given time (seconds). Default - None (until stop).
+        """
+        self.__running = True
+        started = time.monotonic()
+        partial = ''
+
+        with open(path, 'r', encoding='utf-8') as file:
+            if not from_start:
+                file.seek(0, os.SEEK_END)
+
+            while self.__running and (duration is None or time.monotonic() - started < duration):
+                line = file.readline()
+                if line.endswith('\n'):
+                    self.push(partial + line)
+                    partial = ''
+                    continue
+
+                partial += line  # line not finished by device yet
+                if os.path.getsize(path) < file.tell():  # file truncated/rotated
+                    file.seek(0)
+                    partial = ''
+                self.__flush_if_late()
+                time.sleep(poll_interval)
+
+        self.flush()
+
+    def follow_socket(self, host='localhost', port=5000, poll_interval=0.2, duration=None):
+        """Read new-line separated points from local socket and commit them in micro-batches.
+
+            Parameters
+            ----------
+                host (str, optional): socket host. Default - 'localhost'.
+                port (int, optional): socket port. Default - 5000.
+                poll_interval (float, optional): waiting time (seconds) for new data. Default - 0.2.
+                duration (float, optional): stop reading after given time (seconds). Default - None (until stop
+                                            or connection closed).
+        """
+        self.__running = True
+        started = time.monotonic()
+        partial = b''
+
+        with socket.create_connection((host, port)) as connection:
+            connection.settimeout(poll_interval)
+
+            while self.__running and (duration is None or time.monotonic() - started < duration):
+                try:
+                    chunk = connection.recv(65536)
+                except socket.timeout:
+                    self.__flush_if_late()
+                    continue
+                if not chunk:  # connection closed
+                    break
+
+                *lines, partial = (partial + chunk).split(b'\n')
+                for line in lines:
+                    self.push(line.decode('utf-8'))
+
+        if partial:  # last line without new line character
+            self.push(partial.decode('utf-8'))
+        self.flush()
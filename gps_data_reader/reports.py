@@ -0,0 +1,180 @@
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from gps_data_reader.db_manager import DBManager
+from gps_data_reader.sharding import ShardedDBManager
+from gps_data_reader.utils.validation import report_args_validation
+
+REPORTS = ('route_map', 'crossing_borders_map', 'distance_diagram', 'speed_diagram')
+MAPS = ('route_map', 'crossing_borders_map')  # folium maps - html only
+
+# reader of worker process - opened once and shared by all tasks of the process
+_reader = None
+
+
+def _open_database(database, shard_by):
+    return DBManager(database) if shard_by is None else ShardedDBManager(database, shard_by=shard_by)
+
+
+def _init_worker(company, database, shard_by):
+    global _reader
+    from gps_data_reader.gps import GpsDataReader
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        _reader = GpsDataReader(company, database=_open_database(database, shard_by))
+
+
+def _render_vehicle(vehicle, date_range, jobs, image_format):
+    """Renders reports {report: path} of vehicle from one selection. Returns {report: error or None}."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        _reader.data_filter(vehicle=vehicle, date_range=date_range)
+
+    errors = dict()
+    for report, path in jobs.items():
+        try:
+            if report in MAPS:
+                getattr(_reader, report)().save(path)
+            else:
+                figure = getattr(_reader, report)(show=False)
+                figure.write_html(path)
+                if image_format:
+                    figure.write_image(os.path.splitext(path)[0] + '.' + image_format)
+            errors[report] = None
+        except Exception as error:
+            errors[report] = f'{type(error).__name__}: {error}'
+    return errors
+
+
+class BatchReportRenderer:
+    """Renders route maps and diagrams of many vehicles to html/image files in parallel (process pool).
+
+        Every worker process opens database and GpsDataReader once - points of vehicle are read once
+        and shared by all its reports. Reports of selections unchanged since their last rendering
+        (see manifest.json in output directory) are skipped.
+
+        'Attributes'
+        ------------
+            company (str): transportation company name.
+            output_dir (str, optional): reports directory. Default - 'reports'.
+            database (str, optional): database path (shards directory for shard_by). Default - company + ".db".
+            shard_by (str, optional): 'month' or 'vehicle' - ShardedDBManager database. Default - None.
+            workers (int, optional): number of worker processes. Default - None (number of CPUs).
+    """
+
+    manifest_name = 'manifest.json'
+
+    def __init__(self, company, output_dir='reports', database=None, shard_by=None, workers=None):
+        self.company = company
+        self.output_dir = output_dir
+        self.database = company + ".db" if database is None else database
+        self.shard_by = shard_by
+        self.workers = workers or os.cpu_count()
+        self.__database = _open_database(self.database, shard_by)  # selections fingerprints
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def __repr__(self):
+        return f"{type(self).__name__} - ({self.company}, {self.output_dir})"
+
+    def close(self):
+        self.__database.close()
+
+    def __fingerprint(self, vehicle, date_range):
+        """Selection state - reports are outdated when points are added or removed."""
+        summary = self.__database.route_summary('gps', vehicle=vehicle, between=date_range)
+        return [summary['count'], summary['first_id'], summary['last_id'], summary['start_date'],
+                summary['end_date']]
+
+    def __path(self, vehicle, date_range, report):
+        period = '_'.join(str(date or 'all')[:10] for date in (date_range or [None, None]))
+        vehicle = ''.join(char if char.isalnum() or char in '-_' else '_' for char in vehicle)
+        return os.path.join(self.output_dir, f'{vehicle}_{period}_{report}.html')
+
+    def __read_manifest(self):
+        path = os.path.join(self.output_dir, self.manifest_name)
+        if not os.path.exists(path):
+            return dict()
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def __write_manifest(self, manifest):
+        path = os.path.join(self.output_dir, self.manifest_name)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=1, sort_keys=True)
+        os.replace(path + '.tmp', path)
+
+    def __up_to_date(self, manifest, path, report, fingerprint, image_format):
+        outputs = [path]
+        if image_format and report not in MAPS:
+            outputs.append(os.path.splitext(path)[0] + '.' + image_format)
+        return manifest.get(os.path.basename(path)) == fingerprint and all(map(os.path.exists, outputs))
+
+    def render(self, vehicles, date_range=None, reports=REPORTS, image_format=None, force=False):
+        """Renders reports of vehicles for given period.
+
+            Parameters
+            ----------
+                vehicles (list of str): registration numbers of the vehicles.
+                date_range (list of str, optional): start/end date. Format - ["yyyy-mm-dd", "yyyy-mm-dd"].
+                                                    Default - None.
+                reports (list of str, optional): 'route_map', 'crossing_borders_map', 'distance_diagram',
+                                                 'speed_diagram'. Default - all reports.
+                image_format (str, optional): diagrams are also saved as image - 'png', 'jpeg', 'svg' or 'pdf'
+                                              (requires kaleido). Default - None (html only).
+                force (bool, optional): True - render also up to date reports. Default - False.
+
+            Returns
+            ----------
+            pandas.DataFrame: 'vehicle', 'report', 'path', 'status' ('rendered', 'skipped', 'no data' or
+                              'failed') and 'error' of every report.
+        """
+        report_args_validation(vehicles, date_range, reports, REPORTS, image_format)
+        manifest = self.__read_manifest()
+        results = dict()
+        tasks = dict()
+
+        for vehicle in dict.fromkeys(vehicles):
+            fingerprint = self.__fingerprint(vehicle, date_range)
+            jobs = dict()
+            for report in reports:
+                path = self.__path(vehicle, date_range, report)
+                if fingerprint[0] == 0:
+                    results[vehicle, report] = (path, 'no data', None)
+                elif not force and self.__up_to_date(manifest, path, report, fingerprint, image_format):
+                    results[vehicle, report] = (path, 'skipped', None)
+                else:
+                    jobs[report] = path
+            if jobs:
+                tasks[vehicle] = (fingerprint, jobs)
+
+        if tasks:
+            # spawned workers - forked ones would inherit SQLite connections and query threads of this process
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)), initializer=_init_worker,
+                                     initargs=(self.company, self.database, self.shard_by),
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = {vehicle: executor.submit(_render_vehicle, vehicle, date_range, jobs, image_format)
+                           for vehicle, (fingerprint, jobs) in tasks.items()}
+
+                for vehicle, future in futures.items():
+                    fingerprint, jobs = tasks[vehicle]
+                    try:
+                        errors = future.result()
+                    except Exception as error:  # worker process failure - other vehicles are not affected
+                        errors = {report: f'{type(error).__name__}: {error}' for report in jobs}
+
+                    for report, path in jobs.items():
+                        if errors[report] is None:
+                            manifest[os.path.basename(path)] = fingerprint
+                            results[vehicle, report] = (path, 'rendered', None)
+                        else:
+                            results[vehicle, report] = (path, 'failed', errors[report])
+
+            self.__write_manifest(manifest)
+
+        return pd.DataFrame([(vehicle, report, *results[vehicle, report])
+                             for vehicle in dict.fromkeys(vehicles) for report in reports],
+                            columns=['vehicle', 'report', 'path', 'status', 'error'])
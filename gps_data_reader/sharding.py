@@ -0,0 +1,356 @@
+import os
+import glob
+import heapq
+import sqlite3
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+from gps_data_reader.db_manager import DBManager, merge_distance_summaries, merge_route_summaries, locked
+from gps_data_reader.utils.validation import search_values_args_validation, sharded_db_args_validation, \
+    search_many_args_validation
+
+
+class ShardedDBManager:
+    """Class spreads gps table across several SQLite databases (shards) split by month or vehicle hash.
+
+        Inserts are routed to the proper shard, queries fan out across relevant shards in parallel
+        and results are merged in 'dt' order. Row ids are unique across all shards - they are reserved in
+        sequence table of meta database (meta.sqlite in shards directory) shared by all instances of the
+        directory. Shards added by other instances are found before every query.
+        ShardedDBManager can be used as GpsDataReader database.
+
+        'Attributes'
+        ------------
+            database (str): shards directory name/path. If not exists creates new directory.
+            shard_by (str, optional): 'month' - shard per month of 'dt', 'vehicle' - shard per vehicle hash.
+                                      Default - 'month'.
+            shards (int, optional): number of vehicle hash shards (used with shard_by='vehicle'). Default - 8.
+            workers (int, optional): number of threads for parallel queries. Default - 4.
+    """
+
+    meta_name = 'meta.sqlite'
+
+    def __init__(self, database, shard_by='month', shards=8, workers=4):
+        sharded_db_args_validation(shard_by, shards, workers)
+        self.database = database
+        self.shard_by = shard_by
+        self.shards = shards
+        self.__executor = ThreadPoolExecutor(max_workers=workers)
+        self.__written = set()  # shards with uncommitted inserts
+        self._lock = threading.RLock()  # ids and shards state shared by threads
+        # events are stitched per vehicle inside shard - vehicle hash shards only
+        self.__events = shard_by == 'vehicle'
+
+        os.makedirs(database, exist_ok=True)
+        # autocommit - sequence is locked only while ids are reserved
+        self.__meta = sqlite3.connect(os.path.join(database, self.meta_name), timeout=100,
+                                      check_same_thread=False, isolation_level=None)
+        self.__meta.execute('CREATE TABLE IF NOT EXISTS sequence ("name" TEXT PRIMARY KEY, "last_id" INTEGER)')
+        self.__shards = dict()
+        self.__scan_shards()
+
+    def __repr__(self):
+        return f'Sharded database ({self.database}, {len(self.__shards)} shards by {self.shard_by})'
+
+    def __shard_key(self, row):
+        """Shard name for row without id - (dt, vehicle, ...)."""
+        if self.shard_by == 'month':
+            return str(row[0])[:7]
+        return f'vehicle_{zlib.crc32(str(row[1]).encode()) % self.shards}'
+
+    @locked
+    def __scan_shards(self):
+        """Opens shards created by other instances of shards directory."""
+        for path in sorted(glob.glob(os.path.join(self.database, '*.db'))):
+            key = os.path.basename(path)[:-3]
+            if key not in self.__shards:
+                self.__shards[key] = DBManager(path)
+
+    def __tables(self):
+        return [row[0] for row in self.__meta.execute('SELECT "name" FROM sequence')]
+
+    @locked
+    def __shard(self, key, write=False):
+        if write:
+            self.__written.add(key)
+        if key not in self.__shards:
+            self.__shards[key] = DBManager(os.path.join(self.database, key + '.db'))
+            for table in self.__tables():
+                self.__shards[key].create_table(table, events=self.__events)
+        return self.__shards[key]
+
+    @locked
+    def __next_ids(self, table, count):
+        """Reserves ids in sequence shared by all instances of shards directory."""
+        self.__meta.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.__meta.execute('SELECT "last_id" FROM sequence WHERE "name" = (?)', (table,)).fetchone()
+            if row is None:  # table not created by ShardedDBManager
+                self.__scan_shards()
+                row = (max([shard.last_id(table) for shard in self.__shards.values()], default=0),)
+            self.__meta.execute('INSERT OR REPLACE INTO sequence VALUES (?, ?)', (table, row[0] + count))
+        except Exception:
+            self.__meta.execute('ROLLBACK')
+            raise
+        self.__meta.execute('COMMIT')
+        return range(row[0] + 1, row[0] + 1 + count)
+
+    def __search_shard_keys(self, between):
+        """Names of shards which may contain rows from date range (all shards for vehicle hash)."""
+        with self._lock:  # shards may be added by inserts of other thread or by other instances
+            self.__scan_shards()
+            keys = list(self.__shards.keys())
+        if self.shard_by == 'vehicle' or not between:
+            return keys
+
+        start = (between[0] or '2000-01-01')[:7]
+        end = (between[1] or date.today().strftime("%Y-%m-%d"))[:7]
+        return [key for key in keys if start <= key <= end]
+
+    def __search_shards(self, between):
+        return [self.__shards[key] for key in self.__search_shard_keys(between)]
+
+    def __map(self, method, *args):
+        with self._lock:
+            self.__scan_shards()
+            shards = list(self.__shards.values())
+        return list(self.__executor.map(lambda shard: getattr(shard, method)(*args), shards))
+
+    @property
+    def shard_names(self):
+        """Get names of shards."""
+        with self._lock:
+            self.__scan_shards()
+            return sorted(self.__shards.keys())
+
+    def info(self):
+        """Get specifications of shards tables."""
+        for key in self.shard_names:
+            self.__shards[key].info()
+
+    @locked
+    def commit(self):
+        written, self.__written = self.__written, set()
+        for key in written:
+            self.__shards[key].commit()
+
+    @locked
+    def rollback(self):
+        written, self.__written = self.__written, set()
+        for key in written:
+            self.__shards[key].rollback()
+
+    def begin_transaction(self):
+        self.__map('begin_transaction')
+
+    @locked
+    def close(self):
+        for shard in self.__shards.values():
+            shard.close()
+        self.__meta.close()
+        self.__executor.shutdown(wait=True)
+
+    @locked
+    def create_table(self, table: str):
+        """Creates empty gps table in every shard (also in shards created later by inserts of all instances)."""
+        self.__scan_shards()
+        for shard in self.__shards.values():
+            shard.create_table(table, events=self.__events)
+        last_id = max([shard.last_id(table) for shard in self.__shards.values()], default=0)
+        self.__meta.execute('INSERT OR IGNORE INTO sequence VALUES (?, ?)', (table, last_id))
+
+    def has_events(self, table):
+        return self.__events and bool(self.__shards) and all(self.__map('has_events', table))
+
+    def build_events(self, table):
+        """(Re)builds events tables of shards (vehicle hash shards only)."""
+        if not self.__events:
+            raise Exception("Events require shard_by='vehicle' - points of vehicle must be in one shard.")
+        self.__map('build_events', table)
+
+    @locked
+    def insert_dataframe(self, table, df, if_exists='append'):
+        """Insert values as pandas dataframe (routed to shards)."""
+        df = df.copy()
+        df.insert(0, 'id', self.__next_ids(table, len(df)))
+        keys = [self.__shard_key(row) for row in zip(df['dt'], df['vehicle'])]
+
+        for key, shard_df in df.groupby(keys):
+            self.__shard(key, write=True).insert_dataframe(table, shard_df, if_exists=if_exists)
+
+    @locked
+    def insert_values(self, table, values: list):
+        """Insert values as list of tuples (routed to shards)."""
+        routed = dict()
+        for row_id, row in zip(self.__next_ids(table, len(values)), values):
+            routed.setdefault(self.__shard_key(row), []).append((row_id,) + tuple(row))
+
+        for key, rows in routed.items():
+            self.__shard(key, write=True).insert_values(table, rows, with_id=True)
+
+    def search_values(self, table, vehicle='', driver='', between=None, after_id=0):
+        """Search values by filter arguments in relevant shards (in parallel).
+
+        'Parameters'
+        ------------
+            table (str): table name - 'gps'.
+            vehicle (str, optional): registration number of the vehicle.
+            driver (str, optional): driver name/surname.
+            date_range(list of str, optional): start/end date of route. Format - ["yyyy-mm-dd", "yyyy-mm-dd"].
+                                                Default - None.
+            after_id (int, optional): select only rows with greater id. Default - 0.
+
+        'Yields'
+        ----------
+            generator object - rows in 'dt' order.
+        """
+        search_values_args_validation(vehicle, driver, between)
+
+        def search_shard(shard):
+            return sorted(shard.search_values(table, vehicle, driver, between, after_id), key=itemgetter(1, 0))
+
+        results = self.__executor.map(search_shard, self.__search_shards(between))
+
+        for row in heapq.merge(*results, key=itemgetter(1, 0)):
+            yield row
+
+    def search_many(self, table, keys):
+        """Search values for many (vehicle, start date, end date) keys - keys are routed to relevant shards
+        and answered with one join per shard (in parallel). See DBManager.search_many.
+
+        'Returns'
+        ----------
+            dict: {key: {column name: numpy.array}} - rows of every key in 'dt' order.
+        """
+        search_many_args_validation(keys)
+        keys = list(dict.fromkeys(keys))
+
+        routed = dict()
+        self.__scan_shards()
+        for key in keys:
+            if self.shard_by == 'vehicle':
+                shard_keys = [self.__shard_key(('', key[0]))]
+            else:
+                shard_keys = self.__search_shard_keys(list(key[1:]))
+            for shard_key in shard_keys:
+                if shard_key in self.__shards:
+                    routed.setdefault(shard_key, []).append(key)
+
+        results = list(self.__executor.map(lambda item: self.__shards[item[0]].search_many(table, item[1]),
+                                           routed.items()))
+        columns = self.get_column_names(table) if self.__shards else []
+
+        selected = dict()
+        for key in keys:
+            parts = [result[key] for result in results if key in result]
+            data = {col: np.concatenate([part[col] for part in parts]) if parts else np.array([], dtype=object)
+                    for col in columns}
+            if len(parts) > 1:  # month shards - merge in ('dt', 'id') order
+                order = np.lexsort((data['id'].astype('int64'), data['dt'].astype(str)))
+                data = {col: values[order] for col, values in data.items()}
+            selected[key] = data
+        return selected
+
+    def search_time_range(self, table, vehicle, start, end):
+        """Range seek with neighbouring fixes merged from shards (in parallel). See DBManager.search_time_range.
+
+        'Returns'
+        ----------
+            list of tuples: rows in ('dt', 'id') order.
+        """
+        if self.shard_by == 'vehicle':
+            self.__scan_shards()
+            shard_key = self.__shard_key(('', vehicle))
+            return self.__shards[shard_key].search_time_range(table, vehicle, start, end) \
+                if shard_key in self.__shards else []
+
+        # neighbouring fixes may be stored in other month shards - nearest ones are among fixes of every shard
+        return sorted((row for result in self.__map('search_time_range', table, vehicle, start, end)
+                       for row in result), key=itemgetter(1, 0))
+
+    def route_summary(self, table, vehicle='', driver='', between=None):
+        """Route summary merged from shards aggregate queries (in parallel). See DBManager.route_summary."""
+        search_values_args_validation(vehicle, driver, between)
+        return merge_route_summaries(self.__executor.map(
+            lambda shard: shard.route_summary(table, vehicle, driver, between), self.__search_shards(between)))
+
+    def route_endpoints(self, table, vehicle='', driver='', between=None):
+        """First and last point (by "id") of shards endpoints (in parallel). See DBManager.route_endpoints."""
+        search_values_args_validation(vehicle, driver, between)
+        rows = [row for endpoints in self.__executor.map(
+            lambda shard: shard.route_endpoints(table, vehicle, driver, between), self.__search_shards(between))
+            for row in endpoints]
+        return [min(rows, key=itemgetter(0)), max(rows, key=itemgetter(0))] if rows else []
+
+    def daily_distance(self, table, vehicle='', driver='', between=None):
+        """Travelled distance per day merged from shards window queries (in parallel).
+        See DBManager.daily_distance.
+
+        'Returns'
+        ----------
+            pandas.Series
+        """
+        search_values_args_validation(vehicle, driver, between)
+        summaries = self.__executor.map(lambda shard: shard.distance_summary(table, vehicle, driver, between),
+                                        self.__search_shards(between))
+
+        # route parts in order of their last point
+        summaries = sorted((summary for summary in summaries if summary['last_date'] is not None),
+                           key=itemgetter('last_date'))
+        return merge_distance_summaries(summaries)
+
+    def search_events(self, table, vehicle='', driver='', between=None, events=None):
+        """Search events in shards (in parallel). See DBManager.search_events.
+
+        'Yields'
+        ----------
+            generator object - events in 'dt' order.
+        """
+        search_values_args_validation(vehicle, driver, between)
+
+        def search_shard(shard):
+            return list(shard.search_events(table, vehicle, driver, between, events))
+
+        results = self.__executor.map(search_shard, self.__search_shards(between))
+
+        for row in heapq.merge(*results, key=itemgetter(2, 1)):
+            yield row
+
+    def find_duplicates(self, table):
+        duplicated = pd.concat(self.__map('find_duplicates', table))
+        duplicated = duplicated.sort_values(duplicated.columns[-1], ascending=False)
+        return duplicated
+
+    def drop_duplicates(self, table):
+        self.__map('drop_duplicates', table)
+
+    @locked
+    def drop_table(self, table):
+        self.__map('drop_table', table)
+        self.__meta.execute('DELETE FROM sequence WHERE "name" = (?)', (table,))
+
+    def table_length(self, table):
+        return sum(self.__map('table_length', table))
+
+    def total_changes(self):
+        self.__map('total_changes')
+
+    def get_column_names(self, table):
+        if not self.__shards:
+            raise Exception(f'Database - {self.database} is empty.')
+        return self.__shard(self.shard_names[0]).get_column_names(table)
+
+    @staticmethod
+    def delete_database(database):
+        # shards and meta database with journal files
+        for path in glob.glob(os.path.join(database, '*.db*')) + \
+                glob.glob(os.path.join(database, ShardedDBManager.meta_name + '*')):
+            os.remove(path)
+        os.rmdir(database)
+        print(f'{str(database)} deleted succesfully.')
+
+    generator_converter = staticmethod(DBManager.generator_converter)
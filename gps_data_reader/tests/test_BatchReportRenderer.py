@@ -0,0 +1,83 @@
+import os
+import shutil
+import unittest
+from parameterized import parameterized
+from gps_data_reader.db_manager import DBManager
+from gps_data_reader.reports import BatchReportRenderer
+from gps_data_reader.sharding import ShardedDBManager
+from test_data import *
+
+
+class TestBatchReportRenderer(unittest.TestCase):
+    period = ['2020-01-01', '2021-12-31']
+
+    def setUp(self):
+        self.db = DBManager("test_reports.db")
+        self.db.create_table('gps')
+        self.db.insert_values('gps', test_values)
+        self.db.commit()
+        self.renderer = BatchReportRenderer('test_reports', output_dir='test_reports_output', workers=2)
+
+    def tearDown(self):
+        self.renderer.close()
+        self.db.close()
+        DBManager.delete_database("test_reports.db")
+        shutil.rmtree('test_reports_output')
+
+    def test_render_reports_to_files(self):
+        result = self.renderer.render(['PL55555', 'GB06666'], self.period)
+
+        self.assertEqual(result['status'].tolist(), 8 * ['rendered'])
+        self.assertTrue(all(map(os.path.exists, result['path'])))
+
+    def test_skip_up_to_date_reports(self):
+        self.renderer.render(['PL55555', 'GB06666'], self.period, reports=['speed_diagram'])
+
+        # new point of PL55555 - only its report is outdated
+        self.db.insert_values('gps', test_values[:1])
+        self.db.commit()
+        result = self.renderer.render(['PL55555', 'GB06666'], self.period, reports=['speed_diagram'])
+
+        self.assertEqual(result['status'].tolist(), ['rendered', 'skipped'])
+
+    def test_worker_failure_does_not_stop_other_reports(self):
+        # vehicle without coordinates - maps cannot be rendered
+        self.db.insert_values('gps', [('2021-11-11 05:50:00', 'XX1', 'Jan Nowak', 'Kraków', 'PL', 0, 100.0, 0, 0,
+                                       None, None)])
+        self.db.commit()
+
+        result = self.renderer.render(['XX1', 'GB06666', 'NONE'], self.period, reports=['route_map'])
+
+        self.assertEqual(result['status'].tolist(), ['failed', 'rendered', 'no data'])
+        self.assertIn('ValueError', result['error'].iloc[0])
+
+    def test_render_sharded_database(self):
+        # arrange - renderer holds shards connections and query threads while workers start
+        shards = ShardedDBManager('test_reports_shards', shard_by='month')
+        shards.create_table('gps')
+        shards.insert_values('gps', test_values)
+        shards.commit()
+        renderer = BatchReportRenderer('test_reports', output_dir='test_reports_output',
+                                       database='test_reports_shards', shard_by='month', workers=2)
+
+        # act
+        result = renderer.render(['PL55555', 'GB06666'], self.period, reports=['speed_diagram'])
+        renderer.close()
+        shards.close()
+        ShardedDBManager.delete_database('test_reports_shards')
+
+        # assert
+        self.assertEqual(result['status'].tolist(), ['rendered', 'rendered'])
+
+    @parameterized.expand([
+        ('vehicles_str', 'PL55555', ['route_map'], None, TypeError),
+        ('unknown_report', ['PL55555'], ['route_info'], None, ValueError),
+        ('image_format', ['PL55555'], ['speed_diagram'], 'bmp', ValueError),
+    ])
+    def test_render_args_validation(self, test_name, vehicles, reports, image_format, error):
+        with self.assertRaises(error):
+            self.renderer.render(vehicles, self.period, reports, image_format)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
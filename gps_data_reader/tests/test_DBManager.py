@@ -1,7 +1,10 @@
 import unittest
+import shutil
 import sqlite3
+from datetime import date
 from parameterized import parameterized
 from gps_data_reader.db_manager import DBManager
+from gps_data_reader.gps import GpsDataReader
 from test_data import *
 
 
@@ -216,5 +219,425 @@ class TestDBManagerSearchingValues(unittest.TestCase):
         self.assertRaises(TypeError, self.db.search_values(table, vehicle, driver, between))
 
 
+class TestDBManagerEvents(unittest.TestCase):
+    # route UKR -> PL with ignition switched off at the end
+    route = [('2021-11-12 08:00:00', 'PL55555', 'John Smith', 'Lviv', 'UKR', 50, 500600.0, 1, 1, 24.0, 49.8),
+             ('2021-11-12 09:00:00', 'PL55555', 'John Smith', 'Medyka', 'UKR', 10, 500680.0, 1, 1, 22.9, 49.8),
+             ('2021-11-12 10:00:00', 'PL55555', 'John Smith', 'Przemyśl', 'PL', 40, 500690.0, 1, 1, 22.7, 49.7),
+             ('2021-11-12 11:00:00', 'PL55555', 'John Smith', 'Rzeszów', 'PL', 0, 500770.0, 0, 0, 22.0, 50.0)]
+
+    def setUp(self):
+        self.db = DBManager("test_events_db")
+        self.db.create_table('gps')
+
+    def tearDown(self):
+        self.db.close()
+        DBManager.delete_database("test_events_db")
+
+    def test_events_stitched_between_batches(self):
+        # arrange - border crossed between two inserted batches
+        self.db.insert_values('gps', self.route[:2])
+        self.db.insert_values('gps', self.route[2:])
+
+        # act
+        events = [(row[1], row[7], row[8]) for row in self.db.search_events('gps')]
+
+        # assert
+        expected = [(2, 'exit', 'PL'), (3, 'entry', 'UKR'), (4, 'ignition_off', None), (4, 'engine_off', None)]
+        self.assertEqual(events, expected)
+
+    def test_build_events_equals_incremental(self):
+        for row in self.route:
+            self.db.insert_values('gps', [row])
+        incremental = [row[1:] for row in self.db.search_events('gps')]
+
+        self.db.build_events('gps')
+
+        self.assertEqual([row[1:] for row in self.db.search_events('gps')], incremental)
+
+    def test_late_point_events_rebuilt(self):
+        # arrange - late fix inserted between points of previous batches (UKR 08:00, PL 10:00, late PL 09:00)
+        late = (self.route[1][0],) + self.route[2][1:]
+        self.db.insert_values('gps', [self.route[0], self.route[2]])
+        self.db.insert_values('gps', [late])
+        incremental = [row[1:] for row in self.db.search_events('gps')]
+
+        # act
+        self.db.build_events('gps')
+
+        # assert
+        self.assertEqual(incremental, [row[1:] for row in self.db.search_events('gps')])
+        self.assertEqual([(row[1], row[7]) for row in self.db.search_events('gps', events=['entry', 'exit'])],
+                         [(1, 'exit'), (3, 'entry')])
+
+    def test_missing_country_events(self):
+        route = [row[:4] + (country,) + row[5:] for row, country in zip(self.route, ['UKR', None, None, 'PL'])]
+        for row in route:
+            self.db.insert_values('gps', [row])
+
+        events = [(row[1], row[7], row[8]) for row in self.db.search_events('gps', events=['entry', 'exit'])]
+
+        expected = [(1, 'exit', None), (2, 'entry', 'UKR'), (3, 'exit', 'PL'), (4, 'entry', None)]
+        self.assertEqual(events, expected)
+
+    @parameterized.expand([
+        ('loaded_points', False),
+        ('push_down', True),
+    ])
+    def test_crossing_borders_equals_points_labels(self, test_name, push_down):
+        # arrange - the same route in database without events (labels of loaded points)
+        route = self.route + [('2021-11-12 12:00:00',) + self.route[0][1:4] + (None,) + self.route[0][5:]]
+        self.db.insert_values('gps', route)
+        points_db = DBManager("test_points_db")
+        points_db.create_table('gps', events=False)
+        points_db.insert_values('gps', route)
+        expected = GpsDataReader('test_points', vehicle='PL55555', database=points_db).crossing_borders()
+        points_db.close()
+        DBManager.delete_database("test_points_db")
+
+        # act
+        result = GpsDataReader('test_events', vehicle='PL55555', database=self.db, push_down=push_down)\
+            .crossing_borders()
+
+        # assert
+        self.assertEqual(list(result.index), list(expected.index))
+        self.assertEqual(list(result['borders']), list(expected['borders']))
+        self.assertEqual(list(result['detail']), list(expected['detail']))
+        self.assertEqual(result['latitude'].astype(float).tolist(), expected['latitude'].astype(float).tolist())
+
+    def test_crossing_borders_detail_of_vehicle(self):
+        # arrange - point of other vehicle between border points
+        other = ('2021-11-12 09:30:00', 'GB06666', 'Jan Kowalski', 'Berlin', 'DE', 50, 121121.0, 1, 1, 13.4, 52.5)
+        self.db.insert_values('gps', self.route[:2] + [other] + self.route[2:])
+
+        # act
+        result = GpsDataReader('test_events', date_range=['2021-11-12', '2021-11-13'], database=self.db,
+                               push_down=True).crossing_borders()
+
+        # assert
+        self.assertEqual(list(result.index), [1, 2, 4, 5])
+        self.assertEqual(list(result['borders']), ['start', 'exit', 'entry', 'end'])
+        self.assertEqual(list(result['detail'].iloc[1:3]), ['PL', 'UKR'])
+        self.assertTrue(result['detail'].iloc[[0, -1]].isnull().all())
+
+    @parameterized.expand([
+        ('crossings', ['entry', 'exit'], 2),
+        ('ignition', ['ignition_on', 'ignition_off'], 1),
+    ])
+    def test_search_events_filter(self, test_name, events, result):
+        self.db.insert_values('gps', self.route)
+        self.assertEqual(len(list(self.db.search_events('gps', 'PL55555', '', None, events))), result)
+
+    @parameterized.expand([
+        ('unknown_event', ['border'], ValueError),
+        ('events_sent_str_must_be_list', 'entry', TypeError),
+    ])
+    def test_search_events_raise_errors(self, test_name, events, error):
+        with self.assertRaises(error):
+            list(self.db.search_events('gps', events=events))
+
+
+class TestDBManagerSummary(unittest.TestCase):
+    # two days route with missing mileage signal
+    route = [('2021-11-12 20:00:00', 'PL55555', 'John Smith', 'Lviv', 'UKR', 50, 500600.0, 1, 1, 24.0, 49.8),
+             ('2021-11-12 22:00:00', 'PL55555', 'John Smith', 'Medyka', 'UKR', 10, None, 1, 1, 22.9, 49.8),
+             ('2021-11-13 08:00:00', 'PL55555', 'John Smith', 'Przemyśl', 'PL', 40, 500690.0, 1, 1, 22.7, 49.7),
+             ('2021-11-13 11:00:00', 'PL55555', 'John Smith', 'Rzeszów', 'PL', 0, 500770.0, 0, 0, 22.0, 50.0)]
+
+    def setUp(self):
+        self.db = DBManager("test_summary_db")
+        self.db.create_table('gps')
+        self.db.insert_values('gps', test_values)
+
+    def tearDown(self):
+        self.db.close()
+        DBManager.delete_database("test_summary_db")
+
+    def test_route_summary(self):
+        # act
+        summary = self.db.route_summary('gps')
+
+        # assert
+        expected = {'count': 5, 'vehicle': ['BI122', 'GB06666', 'PL55555'],
+                    'driver': ['Elon Musk', 'Jan Kowalski', 'John Smith'],
+                    'start_date': '2020-09-05 19:23:00', 'end_date': '2021-11-11 05:50:00',
+                    'first_id': 1, 'first_country': 'UKR', 'last_id': 5, 'last_country': 'PL',
+                    'min_mileage': 121121.0, 'max_mileage': 521121.0}
+        self.assertEqual(summary, expected)
+
+    def test_route_summary_no_rows(self):
+        summary = self.db.route_summary('gps', vehicle='XX')
+        self.assertEqual((summary['count'], summary['vehicle'], summary['first_country']), (0, [], None))
+
+    @parameterized.expand([
+        ('exact_vehicle', 'PL55555', 2),
+        ('partial_vehicle', 'pl5', 2),
+        ('all_vehicles', '', 5),
+    ])
+    def test_route_summary_vehicle_filter(self, test_name, vehicle, count):
+        self.assertEqual(self.db.route_summary('gps', vehicle=vehicle)['count'], count)
+
+    def test_create_table_dt_index(self):
+        connection = sqlite3.connect("test_summary_db")
+        indexes = connection.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='gps'").fetchall()
+        connection.close()
+        self.assertIn(('gps_dt',), indexes)
+
+    def test_daily_distance(self):
+        # arrange
+        self.db.insert_values('gps', self.route)
+
+        # act
+        daily_distance = self.db.daily_distance('gps', between=['2021-11-12', '2021-11-14'])
+
+        # assert - distance to the next point assigned to the date of point
+        self.assertEqual(daily_distance.to_dict(), {date(2021, 11, 12): 90.0, date(2021, 11, 13): 80.0})
+
+    @parameterized.expand([
+        ('route_info', 'route_info'),
+        ('daily_distance', 'daily_distance'),
+    ])
+    def test_reader_push_down_equals_loaded_points(self, test_name, method):
+        # arrange - "id" order differs from "dt" order (late points)
+        self.db.insert_values('gps', [self.route[2], self.route[3], self.route[0], self.route[1]])
+        between = ['2021-11-12', '2021-11-14']
+
+        # act
+        loaded = getattr(GpsDataReader('test_summary', date_range=between, database=self.db), method)()
+        push_down = getattr(GpsDataReader('test_summary', date_range=between, database=self.db, push_down=True),
+                            method)()
+
+        # assert
+        self.assertEqual(loaded.to_dict(), push_down.to_dict())
+
+
+class TestDBManagerSearchMany(unittest.TestCase):
+
+    def setUp(self):
+        self.db = DBManager("test_search_many_db")
+        self.db.create_table('gps')
+        self.db.insert_values('gps', test_values)
+
+    def tearDown(self):
+        self.db.close()
+        DBManager.delete_database("test_search_many_db")
+
+    def test_search_many_equals_search_values(self):
+        # arrange
+        keys = [('PL55555', '2021-11-01', '2021-11-30'), ('GB06666', None, None), ('BI122', '2021-01-01', None)]
+
+        # act
+        selected = self.db.search_many('gps', keys)
+
+        # assert
+        for vehicle, start, end in keys:
+            expected = list(self.db.search_values('gps', vehicle, between=[start, end]))
+            self.assertEqual(list(zip(*selected[(vehicle, start, end)].values())), expected)
+
+    def test_search_many_vehicle_exact_match(self):
+        selected = self.db.search_many('gps', [('PL5', None, None)])
+        self.assertEqual(len(selected[('PL5', None, None)]['id']), 0)
+
+    def test_search_many_leaves_no_transaction(self):
+        # arrange
+        self.db.commit()
+        self.db.rollback()  # no open transaction
+        self.db.search_many('gps', [('PL55555', None, None)])
+
+        # act - write of external connection is not blocked by search
+        connection = sqlite3.connect("test_search_many_db", timeout=0)
+        connection.execute("DELETE FROM gps WHERE id = 1")
+        connection.commit()
+        connection.close()
+
+        # assert
+        self.assertEqual(self.db.table_length('gps'), len(test_values) - 1)
+
+    def test_create_table_with_rows_leaves_no_transaction(self):
+        # arrange
+        self.db.commit()
+        self.db.rollback()
+        self.db.drop_table('gps_copy')
+        self.db.create_table('gps_copy', events=False)
+        self.db.insert_values('gps_copy', test_values)
+        self.db.commit()
+        self.db.rollback()
+
+        # act - events of existing rows are not created by create_table
+        self.db.create_table('gps_copy')
+        connection = sqlite3.connect("test_search_many_db", timeout=0)
+        connection.execute("DELETE FROM gps_copy WHERE id = 1")
+        connection.commit()
+        connection.close()
+
+        # assert
+        self.assertFalse(self.db.has_events('gps_copy'))
+
+    @parameterized.expand([
+        ('keys_str', 'PL55555'),
+        ('key_list', [['PL55555', None, None]]),
+        ('key_length', [('PL55555', None)]),
+        ('vehicle_int', [(55555, None, None)]),
+    ])
+    def test_search_many_raise_type_errors(self, test_name, keys):
+        with self.assertRaises(TypeError):
+            self.db.search_many('gps', keys)
+
+
+class TestDBManagerArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.db = DBManager("test_archive_db")
+        self.db.create_table('gps')
+        self.db.insert_values('gps', test_values)
+
+    def tearDown(self):
+        self.db.close()
+        DBManager.delete_database("test_archive_db")
+
+    def test_archive_closed_months(self):
+        # act
+        archived = self.db.archive('gps', until='2021-09')
+
+        # assert
+        self.assertEqual(archived, 3)
+        self.assertEqual(self.db.archived_months('gps'), ['2020-09', '2021-08'])
+        self.assertEqual(self.db.table_length('gps'), 2)
+
+    def test_search_values_reads_archive(self):
+        self.db.archive('gps', until='2021-09')
+
+        result = sorted(self.db.search_values('gps', between=['2020-01-01', '2022-01-01']))
+
+        self.assertEqual(result, expected_values)
+
+    @parameterized.expand([
+        ('vehicle', 'gb06', '', None, 2),
+        ('driver', '', 'musk', ['2020-09-05', '2020-09-06'], 1),
+        ('hot_months_only', '', '', ['2021-11-01', '2021-11-30'], 2),
+    ])
+    def test_search_archive_with_args(self, test_name, vehicle, driver, between, result):
+        self.db.archive('gps', until='2021-09')
+        self.assertEqual(len(list(self.db.search_values('gps', vehicle, driver, between))), result)
+
+    def test_archived_ids_not_reused(self):
+        # arrange - whole table archived
+        self.db.archive('gps', until='2022-01')
+
+        # act
+        self.db.insert_values('gps', test_values[:1])
+
+        # assert
+        self.assertEqual(self.db.last_id('gps'), 6)
+
+    def test_late_rows_merged_into_archived_month(self):
+        # arrange
+        self.db.archive('gps', until='2021-09')
+        self.db.insert_values('gps', test_values[2:3])
+
+        # act
+        self.db.archive('gps', until='2021-09')
+
+        # assert
+        rows = list(self.db.search_values('gps', between=['2021-08-01', '2021-08-31 23:59:59']))
+        self.assertEqual([row[0] for row in rows], [3, 4, 6])
+
+    def test_summaries_read_archive(self):
+        # arrange
+        between = ['2020-01-01', '2022-01-01']
+        expected = (self.db.route_summary('gps', between=between), self.db.daily_distance('gps', between=between),
+                    self.db.route_endpoints('gps', between=between))
+
+        # act
+        self.db.archive('gps', until='2021-09')
+
+        # assert
+        self.assertEqual(self.db.route_summary('gps', between=between), expected[0])
+        self.assertEqual(self.db.daily_distance('gps', between=between).to_dict(), expected[1].to_dict())
+        self.assertEqual(self.db.route_endpoints('gps', between=between), expected[2])
+
+    def test_search_many_reads_archive(self):
+        keys = [('GB06666', '2021-08-01', None), ('PL55555', None, None), ('BI122', '2020-01-01', '2020-12-31')]
+        expected = {key: {col: values.tolist() for col, values in data.items()}
+                    for key, data in self.db.search_many('gps', keys).items()}
+
+        self.db.archive('gps', until='2021-09')
+
+        self.assertEqual({key: {col: values.tolist() for col, values in data.items()}
+                          for key, data in self.db.search_many('gps', keys).items()}, expected)
+
+    def test_search_time_range_reads_archive(self):
+        # arrange - the nearest fix before range is archived
+        self.db.insert_values('gps', [('2021-10-05 12:50:00',) + test_values[2][1:]])
+        expected = self.db.search_time_range('gps', 'GB06666', '2021-09-01 00:00:00', '2021-10-01 00:00:00')
+
+        # act
+        self.db.archive('gps', until='2021-09')
+
+        # assert
+        self.assertEqual(self.db.search_time_range('gps', 'GB06666', '2021-09-01 00:00:00', '2021-10-01 00:00:00'),
+                         expected)
+        self.assertEqual([row[1] for row in expected], ['2021-08-05 12:50:00', '2021-10-05 12:50:00'])
+
+    def test_search_after_id_skips_archived_months(self):
+        # arrange - archive files of months with older rows are not read
+        self.db.archive('gps', until='2021-09')
+        shutil.rmtree("test_archive_db_archive")
+
+        # act
+        result = list(self.db.search_values('gps', between=['2020-01-01', '2022-01-01'], after_id=5))
+
+        # assert
+        self.assertEqual(result, [])
+
+    def test_summaries_read_aggregates_of_archived_months(self):
+        # arrange - archived months are summarized without archive files
+        between = ['2020-01-01', '2022-01-01']
+        expected = [(self.db.route_summary('gps', vehicle, between=between),
+                     self.db.route_endpoints('gps', vehicle, between=between)) for vehicle in ('', 'GB06666')]
+        expected_distance = self.db.daily_distance('gps', 'GB06666', between=between).to_dict()
+        self.db.archive('gps', until='2021-09')
+        shutil.rmtree("test_archive_db_archive")
+
+        # act
+        result = [(self.db.route_summary('gps', vehicle, between=between),
+                   self.db.route_endpoints('gps', vehicle, between=between)) for vehicle in ('', 'GB06666')]
+
+        # assert
+        self.assertEqual(result, expected)
+        self.assertEqual(self.db.daily_distance('gps', 'GB06666', between=between).to_dict(), expected_distance)
+
+    def test_events_stitched_to_archived_point(self):
+        # arrange - the last point before border crossing is archived
+        point = ('2021-08-30 10:00:00', 'PL77777', 'Adam Nowak', 'Słubice 1', 'PL', 50, 1000.0, 1, 1, 14.5, 52.3)
+        self.db.insert_values('gps', [point, ('2021-08-31 10:00:00',) + point[1:]])
+        self.db.archive('gps', until='2021-09')
+
+        # act
+        self.db.insert_values('gps', [('2021-09-01 10:00:00', 'PL77777', 'Adam Nowak', 'Frankfurt 1', 'DE', 50,
+                                       1010.0, 1, 1, 14.6, 52.3)])
+
+        # assert
+        events = self.db.search_events('gps', 'PL77777', events=['entry', 'exit'])
+        self.assertEqual([(event[2], event[6], event[7], event[8]) for event in events],
+                         [('2021-08-31 10:00:00', 'PL', 'exit', 'DE'), ('2021-09-01 10:00:00', 'DE', 'entry', 'PL')])
+
+    def test_drop_table_without_archive_files(self):
+        self.db.archive('gps', until='2021-09')
+        shutil.rmtree("test_archive_db_archive")
+
+        self.db.drop_table('gps')
+
+        self.assertEqual(self.db.archived_months('gps'), [])
+
+    @parameterized.expand([
+        ('until_int', 202109, TypeError),
+        ('until_date', '2021-09-01', ValueError),
+    ])
+    def test_archive_args_validation(self, test_name, until, error):
+        with self.assertRaises(error):
+            self.db.archive('gps', until)
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
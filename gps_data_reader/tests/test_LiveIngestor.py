@@ -0,0 +1,161 @@
+import os
+import socket
+import sqlite3
+import threading
+import unittest
+from parameterized import parameterized
+from gps_data_reader.db_manager import DBManager
+from gps_data_reader.gps import GpsDataReader
+from gps_data_reader.live import LiveIngestor
+from test_data import *
+
+# export file lines - 'gps' table columns order without id
+test_lines = [';'.join(str(value) for value in row) + '\n' for row in test_values]
+
+
+class TestLiveIngestor(unittest.TestCase):
+
+    def setUp(self):
+        self.db = DBManager("test_live.db")
+        self.db.create_table('gps')
+        self.ingestor = LiveIngestor(self.db, batch_size=2, max_latency=60)
+
+    def tearDown(self):
+        self.db.close()
+        DBManager.delete_database("test_live.db")
+
+    def test_parse_line(self):
+        self.assertEqual(self.ingestor.parse_line(test_lines[0]), test_values[0])
+
+    @parameterized.expand([
+        ('header', 'dt;vehicle;driver;position;country;speed;mileage;ignition;engine;longitude;latitude\n'),
+        ('partial_line', '2021-11-11 01:43:00;PL55555;John Smith\n'),
+    ])
+    def test_parse_line_raise_value_error(self, test_name, line):
+        with self.assertRaises(ValueError):
+            self.ingestor.parse_line(line)
+
+    def test_push_commits_full_batches(self):
+        for line in test_lines:
+            self.ingestor.push(line)
+
+        # last point waits in buffer for next batch
+        self.assertEqual(self.db.table_length('gps'), 4)
+        self.assertEqual(self.ingestor.flush(), 1)
+        self.assertEqual(self.db.table_length('gps'), len(test_values))
+
+    def test_follow_file(self):
+        with open('test_live_export.csv', 'w') as file:
+            file.writelines(['header\n'] + test_lines)
+
+        self.ingestor.follow_file('test_live_export.csv', from_start=True, poll_interval=0.01, duration=0.1)
+        os.remove('test_live_export.csv')
+
+        self.assertEqual(self.ingestor.rows_added, len(test_values))
+        self.assertEqual(self.ingestor.rows_rejected, 1)
+
+    def test_failed_flush_keeps_buffer(self):
+        # arrange - insert fails (table dropped)
+        self.ingestor.push(test_lines[0])
+        self.db.drop_table('gps')
+        with self.assertRaises(sqlite3.OperationalError):
+            self.ingestor.flush()
+        self.db.create_table('gps')
+
+        # act
+        committed = self.ingestor.flush()
+
+        # assert
+        self.assertEqual(committed, 1)
+        self.assertEqual(self.ingestor.rows_added, 1)
+        self.assertEqual(list(self.db.search_values('gps')), [(1,) + test_values[0]])
+
+    def test_failed_reader_update_does_not_stop_other_readers(self):
+        # arrange - push-down reader cannot be updated
+        self.db.insert_values('gps', test_values[:2])
+        self.db.commit()
+        push_down_reader = GpsDataReader('test_live', driver='Smith', push_down=True)
+        reader = GpsDataReader('test_live', driver='Smith')
+        self.ingestor.subscribe(push_down_reader)
+        self.ingestor.subscribe(reader)
+
+        # act
+        self.ingestor.push(test_lines[0].replace('01:43:00', '06:00:00'))
+        self.ingestor.flush()
+
+        # assert
+        self.assertEqual(len(reader.gps_data['id']), 3)
+        self.assertEqual([failed_reader for failed_reader, error in self.ingestor.update_errors], [push_down_reader])
+
+    def test_follow_socket_last_line_without_new_line(self):
+        # arrange - source sends lines and closes connection
+        server = socket.create_server(('localhost', 0))
+
+        def send():
+            connection, address = server.accept()
+            with connection:
+                connection.sendall(''.join(test_lines).rstrip('\n').encode('utf-8'))
+        thread = threading.Thread(target=send)
+        thread.start()
+
+        # act
+        self.ingestor.follow_socket(port=server.getsockname()[1], poll_interval=0.01, duration=5)
+        thread.join()
+        server.close()
+
+        # assert
+        self.assertEqual(self.ingestor.rows_added, len(test_values))
+
+    @parameterized.expand([
+        ('events_table', True),
+        ('points_labels', False),  # labels of appended points (incremental)
+    ])
+    def test_subscribed_reader_update(self, test_name, events):
+        if not events:
+            self.db.drop_table('gps')
+            self.db.create_table('gps', events=False)
+        self.db.insert_values('gps', test_values[:2])
+        self.db.commit()
+        reader = GpsDataReader('test_live', driver='Smith')
+        reader.crossing_borders()
+        self.ingestor.subscribe(reader)
+
+        self.ingestor.push(test_lines[0].replace('01:43:00', '06:00:00').replace('UKR', 'PL'))
+        self.ingestor.flush()
+
+        expected = GpsDataReader('test_live', driver='Smith')
+        self.assertEqual(len(reader.gps_data['id']), 3)
+        self.assertEqual(list(reader.crossing_borders()['borders']), list(expected.crossing_borders()['borders']))
+        self.assertEqual(reader.crossing_borders()['detail'].fillna('').tolist(),
+                         expected.crossing_borders()['detail'].fillna('').tolist())
+        self.assertEqual(reader.daily_distance().tolist(), expected.daily_distance().tolist())
+
+    def test_concurrent_ingestion_and_reads(self):
+        # arrange - reader subscribed to ingestor running in other thread
+        self.db.insert_values('gps', test_values[:2])
+        self.db.commit()
+        reader = GpsDataReader('test_live', driver='Smith', database=self.db)
+        self.ingestor.subscribe(reader)
+        lines = [test_lines[0].replace('01:43:00', f'{hour:02}:00:00') for hour in range(6, 24)] * 5
+
+        def ingest():
+            for line in lines:
+                self.ingestor.push(line)
+            self.ingestor.flush()
+        thread = threading.Thread(target=ingest)
+
+        # act - caller reads database and selection during ingestion
+        thread.start()
+        while thread.is_alive():
+            self.assertEqual(len(list(self.db.search_values('gps', vehicle='GB06666'))), 0)
+            selected = reader.gps_data
+            self.assertEqual(len({len(values) for values in selected.values()}), 1)  # consistent columns
+            reader.daily_distance()
+        thread.join()
+
+        # assert
+        self.assertEqual(len(reader.gps_data['id']), 2 + len(lines))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,118 @@
+import unittest
+from parameterized import parameterized
+from gps_data_reader.sharding import ShardedDBManager
+from test_data import *
+
+
+class TestShardedDBManager(unittest.TestCase):
+
+    def setUp(self):
+        self.db = ShardedDBManager("test_company_shards", shard_by='month')
+        self.db.create_table('gps')
+
+    def tearDown(self):
+        self.db.close()
+        ShardedDBManager.delete_database("test_company_shards")
+
+    def test_insert_values_routed_to_month_shards(self):
+        self.db.insert_values('gps', test_values)
+        self.db.commit()
+
+        self.assertEqual(self.db.shard_names, ['2020-09', '2021-08', '2021-11'])
+        self.assertEqual(self.db.table_length('gps'), len(test_values))
+
+    def test_unique_id_across_shards(self):
+        self.db.insert_values('gps', test_values)
+        self.db.insert_dataframe('gps', test_values_df)
+
+        ids = [row[0] for row in self.db.search_values('gps')]
+        self.assertEqual(sorted(ids), list(range(1, 2 * len(test_values) + 1)))
+
+    def test_instances_share_ids_and_shards(self):
+        other = ShardedDBManager("test_company_shards", shard_by='month')
+        self.db.insert_values('gps', test_values[:2])
+        self.db.commit()
+        self.assertEqual(self.db.shard_names, ['2021-11'])
+
+        other.insert_values('gps', test_values[2:])  # new shards created by other instance
+        other.commit()
+
+        ids = [row[0] for row in self.db.search_values('gps')]
+        self.assertEqual(self.db.shard_names, ['2020-09', '2021-08', '2021-11'])
+        self.assertEqual(sorted(ids), list(range(1, len(test_values) + 1)))
+        other.close()
+
+    def test_search_values_merged_in_dt_order(self):
+        self.db.insert_values('gps', test_values)
+
+        dates = [row[1] for row in self.db.search_values('gps')]
+        self.assertEqual(dates, sorted(test_values_df['dt']))
+
+    @parameterized.expand([
+        ('vehicle', 'PL55555', '', None, 2),
+        ('driver', '', 'mith', None, 2),
+        ('date_between', '', '', ['2020-09-03', '2021-08-31'], 3),
+    ])
+    def test_search_with_args(self, test_name, vehicle, driver, between, result):
+        self.db.insert_values('gps', test_values)
+        self.assertEqual(len(list(self.db.search_values('gps', vehicle, driver, between))), result)
+
+    def test_route_summary_merged_from_shards(self):
+        self.db.insert_values('gps', test_values)
+
+        summary = self.db.route_summary('gps', between=['2021-01-01', '2021-12-31'])
+
+        self.assertEqual((summary['count'], summary['vehicle'], summary['first_country'], summary['last_country']),
+                         (4, ['GB06666', 'PL55555'], 'UKR', 'PL'))
+        self.assertEqual((summary['min_mileage'], summary['max_mileage']), (121121.0, 500533.0))
+
+    def test_search_many_merged_from_shards(self):
+        self.db.insert_values('gps', test_values)
+
+        selected = self.db.search_many('gps', [('PL55555', None, None), ('BI122', '2020-01-01', '2021-12-31')])
+
+        self.assertEqual(list(selected[('PL55555', None, None)]['id']), [1, 2])
+        self.assertEqual(list(selected[('BI122', '2020-01-01', '2021-12-31')]['dt']), ['2020-09-05 19:23:00'])
+
+    def test_search_time_range_neighbouring_fixes_from_other_shards(self):
+        self.db.insert_values('gps', test_values)
+
+        rows = self.db.search_time_range('gps', 'BI122', '2021-01-01 00:00:00', '2021-02-01 00:00:00')
+
+        self.assertEqual([row[1] for row in rows], ['2020-09-05 19:23:00'])
+
+    def test_vehicle_shards(self):
+        db = ShardedDBManager("test_company_shards_vehicle", shard_by='vehicle', shards=2)
+        db.create_table('gps')
+        db.insert_values('gps', test_values)
+
+        self.assertTrue(set(db.shard_names) <= {'vehicle_0', 'vehicle_1'})
+        self.assertEqual(expected_values, sorted(db.search_values('gps', between=['2020-01-01', '2022-01-01'])))
+        db.close()
+        ShardedDBManager.delete_database("test_company_shards_vehicle")
+
+    def test_vehicle_shards_insert_dataframe_committed(self):
+        db = ShardedDBManager("test_company_shards_vehicle", shard_by='vehicle', shards=2)
+        db.create_table('gps')
+        db.insert_dataframe('gps', test_values_df)
+        db.commit()
+
+        other = ShardedDBManager("test_company_shards_vehicle", shard_by='vehicle', shards=2)
+        self.assertEqual(other.table_length('gps'), len(test_values))
+        self.assertEqual(list(other.search_events('gps')), list(db.search_events('gps')))
+        other.close()
+        db.close()
+        ShardedDBManager.delete_database("test_company_shards_vehicle")
+
+    @parameterized.expand([
+        ('shard_by_day', 'day', 8, 4, ValueError),
+        ('shards_str', 'vehicle', '8', 4, TypeError),
+        ('workers_zero', 'month', 8, 0, ValueError),
+    ])
+    def test_args_validation(self, test_name, shard_by, shards, workers, error):
+        with self.assertRaises(error):
+            ShardedDBManager("test_company_shards", shard_by, shards, workers)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,106 @@
+import unittest
+import numpy as np
+from parameterized import parameterized
+from gps_data_reader.db_manager import DBManager
+from gps_data_reader.gps import GpsDataReader
+from gps_data_reader.time_index import TimeIndex
+from test_data import *
+
+
+class TestTimeIndex(unittest.TestCase):
+    # vehicle fixes every hour, mileage signal missing at 12:00
+    route = [('2021-11-12 10:00:00', 'PL55555', 'John Smith', 'Lviv', 'UKR', 50, 100.0, 1, 1, 24.0, 50.0),
+             ('2021-11-12 11:00:00', 'PL55555', 'John Smith', 'Medyka', 'UKR', 70, 150.0, 1, 1, 23.0, 49.0),
+             ('2021-11-12 12:00:00', 'PL55555', 'John Smith', 'Przemyśl', 'PL', 30, None, 1, 1, 22.0, 49.0),
+             ('2021-11-12 13:00:00', 'PL55555', 'John Smith', 'Rzeszów', 'PL', 0, 250.0, 0, 0, 22.0, 50.0),
+             ('2021-11-12 10:30:00', 'GB06666', 'Jan Kowalski', 'Gdańsk', 'PL', 10, 900.0, 1, 1, 18.6, 54.3)]
+
+    def setUp(self):
+        self.db = DBManager("test_time_index_db")
+        self.db.create_table('gps')
+        self.db.insert_values('gps', self.route)
+
+    def tearDown(self):
+        self.db.close()
+        DBManager.delete_database("test_time_index_db")
+
+    def index(self):
+        reader = GpsDataReader('test_time_index', date_range=['2021-11-12', '2021-11-12 23:59:59'],
+                               database=self.db)
+        return TimeIndex(reader.gps_data)
+
+    def test_interpolate(self):
+        position = self.index().position('PL55555', ['2021-11-12 10:30:00', '2021-11-12 12:30:00'])
+
+        self.assertEqual(position['longitude'].tolist(), [23.5, 22.0])
+        self.assertEqual(position['speed'].tolist(), [60.0, 15.0])
+        # mileage interpolated between fixes with signal
+        self.assertEqual(position['mileage'].tolist(), [125.0, 225.0])
+
+    def test_nearest(self):
+        position = self.index().position('PL55555', ['2021-11-12 10:20:00', '2021-11-12 20:00:00'], 'nearest')
+
+        self.assertEqual(position['speed'].tolist(), [50.0, 0.0])
+        self.assertEqual(position['gap'].tolist(), [1200, 7 * 3600])
+
+    def test_nearest_skips_missing_values(self):
+        # 11:50 - the nearest fix (12:00) has no mileage signal - mileage of 11:00 fix
+        position = self.index().position('PL55555', ['2021-11-12 11:50:00'], 'nearest')
+
+        self.assertEqual(position['speed'].tolist(), [30.0])
+        self.assertEqual(position['mileage'].tolist(), [150.0])
+
+    @parameterized.expand([
+        ('before_first_fix', 'PL55555', '2021-11-12 09:00:00'),
+        ('after_last_fix', 'PL55555', '2021-11-12 14:00:00'),
+        ('unknown_vehicle', 'XX', '2021-11-12 10:00:00'),
+    ])
+    def test_interpolate_without_fixes(self, test_name, vehicle, timestamp):
+        position = self.index().position(vehicle, [timestamp])
+        self.assertTrue(np.isnan(position['latitude'].iloc[0]))
+
+    def test_from_database_equals_selection(self):
+        timestamps = ['2021-11-12 10:45:00', '2021-11-12 11:10:00']
+
+        index = TimeIndex.from_database(self.db, 'PL55555', timestamps)
+
+        self.assertEqual(index.position('PL55555', timestamps).to_dict(),
+                         self.index().position('PL55555', timestamps).to_dict())
+
+    def test_search_time_range_neighbouring_fixes(self):
+        rows = self.db.search_time_range('gps', 'PL55555', '2021-11-12 11:10:00', '2021-11-12 11:50:00')
+        # 13:00 - the nearest fix after range with mileage signal
+        self.assertEqual([row[1] for row in rows], ['2021-11-12 11:00:00', '2021-11-12 12:00:00',
+                                                    '2021-11-12 13:00:00'])
+
+    def test_reader_position_at(self):
+        reader = GpsDataReader('test_time_index', vehicle='PL55555', database=self.db)
+        position = reader.position_at('2021-11-12 10:30:00')
+        self.assertEqual(position['latitude'].tolist(), [49.5])
+
+    @parameterized.expand([
+        ('exact_vehicle', 'PL55555'),
+        ('partial_vehicle', 'pl55'),
+    ])
+    def test_reader_position_at_push_down(self, test_name, vehicle):
+        reader = GpsDataReader('test_time_index', vehicle=vehicle, database=self.db, push_down=True)
+        position = reader.position_at('2021-11-12 10:30:00')
+        self.assertEqual(position['latitude'].tolist(), [49.5])
+
+    @parameterized.expand([
+        ('loaded_points', False),
+        ('push_down', True),
+    ])
+    def test_reader_position_at_raise_exception(self, test_name, push_down):
+        # several vehicles selected
+        reader = GpsDataReader('test_time_index', driver='J', database=self.db, push_down=push_down)
+        with self.assertRaises(Exception):
+            reader.position_at('2021-11-12 10:30:00')
+
+    def test_method_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            self.index().position('PL55555', ['2021-11-12 10:30:00'], method='linear')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
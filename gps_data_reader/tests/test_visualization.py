@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# imports core modules in fresh interpreter - modules loaded by other tests do not interfere
+check_imports = '''
+import json, sys
+import numpy as np
+options = np.get_printoptions()
+import gps_data_reader.gps, gps_data_reader.db_manager, gps_data_reader.time_index
+print(json.dumps({'folium': 'folium' in sys.modules,
+                  'plotly': any(name.split('.')[0] == 'plotly' for name in sys.modules),
+                  'printoptions': np.get_printoptions() == options}))
+'''
+
+
+class TestLazyVisualization(unittest.TestCase):
+
+    def test_core_import_without_rendering_libraries(self):
+        # act
+        output = subprocess.run([sys.executable, '-c', check_imports], capture_output=True, text=True, check=True,
+                                env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+
+        # assert
+        self.assertEqual(json.loads(output.stdout.splitlines()[-1]),
+                         {'folium': False, 'plotly': False, 'printoptions': True})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+from gps_data_reader.utils.validation import position_args_validation
+
+# columns resolved at given moments
+POSITION_COLUMNS = ('latitude', 'longitude', 'speed', 'mileage')
+
+
+class TimeIndex:
+    """Per vehicle time index over 'dt' sorted arrays - answers where the vehicle was (nearest fix or linearly
+    interpolated position, speed and mileage) for many timestamps at once with vectorized binary search.
+
+        'Attributes'
+        ------------
+            gps_data (dict): columnar gps data {column name: numpy.array} - e.g. GpsDataReader.gps_data.
+    """
+
+    def __init__(self, gps_data):
+        self.__index = dict()
+        vehicles = np.asarray(gps_data['vehicle'])
+        times = self.__to_seconds(gps_data['dt'])
+        ids = np.asarray(gps_data['id']).astype('int64')
+
+        for vehicle in np.unique(vehicles):
+            positions = np.flatnonzero(vehicles == vehicle)
+            positions = positions[np.lexsort((ids[positions], times[positions]))]  # 'dt' order
+
+            points = {'dt': times[positions]}
+            for col in POSITION_COLUMNS:
+                points[col] = pd.Series(gps_data[col][positions], dtype='float64').to_numpy()
+            self.__index[str(vehicle)] = points
+
+    def __repr__(self):
+        return f"{type(self).__name__} - ({len(self.__index)} vehicles)"
+
+    @classmethod
+    def from_database(cls, database, vehicle, timestamps, table='gps'):
+        """Time index of vehicle points read directly from database - only points between given timestamps
+        and their neighbouring fixes are read by indexed range seek (see DBManager.search_time_range).
+
+            Parameters
+            ----------
+                database (DBManager or ShardedDBManager): database instance.
+                vehicle (str): registration number of the vehicle (exact match).
+                timestamps (str or list): moments to resolve. Format - "yyyy-mm-dd hh:mm:ss".
+                table (str, optional): table name. Default - 'gps'.
+
+            Returns
+            ----------
+            TimeIndex
+        """
+        col_names = database.get_column_names(table)
+        seconds = cls.__to_seconds(timestamps)
+        rows = []
+        if len(seconds):
+            start, end = np.datetime_as_string(np.array([seconds.min(), seconds.max()], dtype='datetime64[s]'))
+            rows = database.search_time_range(table, vehicle, start.replace('T', ' '), end.replace('T', ' '))
+
+        data = np.array(rows, dtype=object).reshape(-1, len(col_names))
+        return cls({col: data[:, index] for index, col in enumerate(col_names)})
+
+    @property
+    def vehicles(self):
+        """Get indexed vehicles."""
+        return sorted(self.__index.keys())
+
+    @staticmethod
+    def __to_seconds(timestamps):
+        """Timestamps (str, datetime, numpy.datetime64) as int64 seconds."""
+        return np.atleast_1d(np.asarray(timestamps)).astype('datetime64[s]').astype('int64')
+
+    @staticmethod
+    def __nearest(times, query):
+        """Indexes of the nearest fixes."""
+        after = np.clip(np.searchsorted(times, query), 0, len(times) - 1)
+        before = np.clip(after - 1, 0, len(times) - 1)
+        return np.where(np.abs(times[after] - query) < np.abs(query - times[before]), after, before)
+
+    @staticmethod
+    def __nearest_values(times, values, query):
+        """Values of the nearest fixes (fixes without value are skipped). NaN - no fix with value."""
+        valid = ~np.isnan(values)
+        if not valid.any():
+            return np.full(len(query), np.nan)
+        return values[valid][TimeIndex.__nearest(times[valid], query)]
+
+    @staticmethod
+    def __interpolate(times, values, query):
+        """Linear interpolation between fixes surrounding query (fixes without value are skipped).
+        NaN - query outside of fixes time range."""
+        valid = ~np.isnan(values)
+        times, values = times[valid], values[valid]
+        result = np.full(len(query), np.nan)
+        if len(times) == 0:
+            return result
+
+        before = np.searchsorted(times, query, side='right') - 1  # last fix at or before query
+        after = np.searchsorted(times, query, side='left')  # first fix at or after query
+        inside = (before >= 0) & (after < len(times))
+        before, after, query = before[inside], after[inside], query[inside]
+
+        span = times[after] - times[before]
+        weight = np.divide(query - times[before], span, out=np.zeros(len(query)), where=span > 0)
+        result[inside] = values[before] + weight * (values[after] - values[before])
+        return result
+
+    def position(self, vehicle, timestamps, method='interpolate'):
+        """Vehicle position at given moments.
+
+            Parameters
+            ----------
+                vehicle (str): registration number of the vehicle.
+                timestamps (str or list): moments to resolve. Format - "yyyy-mm-dd hh:mm:ss".
+                method (str, optional): 'interpolate' - linear interpolation between surrounding fixes,
+                                        'nearest' - values of the nearest fix with signal (per column).
+                                        Default - 'interpolate'.
+
+            Returns
+            ----------
+            pandas.DataFrame: 'dt', 'vehicle', 'latitude', 'longitude', 'speed', 'mileage',
+                              'fix_dt' (nearest fix), 'gap' (seconds to the nearest fix).
+                              NaN - vehicle has no fixes (or moment outside fixes range for 'interpolate').
+        """
+        position_args_validation(vehicle, method)
+        query = self.__to_seconds(timestamps)
+        points = self.__index.get(vehicle)
+
+        result = {'dt': query.astype('datetime64[s]'), 'vehicle': vehicle}
+        if points is None or len(points['dt']) == 0:
+            result.update({col: np.nan for col in POSITION_COLUMNS})
+            result.update({'fix_dt': np.datetime64('NaT', 's'), 'gap': np.nan})
+            return pd.DataFrame(result, index=range(len(query)))
+
+        # sorted queries keep binary search cache friendly - results are scattered back to query order
+        order = np.argsort(query, kind='stable')
+        sorted_query = query[order]
+
+        nearest = np.empty(len(query), dtype='int64')
+        nearest[order] = self.__nearest(points['dt'], sorted_query)
+        resolve = self.__nearest_values if method == 'nearest' else self.__interpolate
+        for col in POSITION_COLUMNS:
+            result[col] = np.empty(len(query))
+            result[col][order] = resolve(points['dt'], points[col], sorted_query)
+
+        result['fix_dt'] = points['dt'][nearest].astype('datetime64[s]')
+        result['gap'] = np.abs(query - points['dt'][nearest])
+        return pd.DataFrame(result)
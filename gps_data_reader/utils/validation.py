@@ -17,3 +17,79 @@ def search_values_args_validation(vehicle, driver, between):
             for arg in between:
                 if not isinstance(arg, str) and arg is not None:
                     raise TypeError("Required date format ['yyyy-mm-dd', 'yyyy-mm-dd'].")
+
+
+def sharded_db_args_validation(shard_by, shards, workers):
+    """ShardedDBManager() arguments validation."""
+
+    if shard_by not in ('month', 'vehicle'):
+        raise ValueError(f"'shard_by' argument must be 'month' or 'vehicle' not {shard_by!r}.")
+
+    for name, value in (('shards', shards), ('workers', workers)):
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise TypeError(f"'{name}' argument must be int not {type(value).__name__} type.")
+        if value < 1:
+            raise ValueError(f"'{name}' argument must be positive integer.")
+
+
+def events_args_validation(events, known_events):
+    """DBManager.search_events() arguments validation."""
+
+    if not isinstance(events, (list, tuple)) and events is not None:
+        raise TypeError(f"'events' argument must be list not {type(events).__name__} type.")
+    if events:
+        for event in events:
+            if event not in known_events:
+                raise ValueError(f"Unknown event {event!r}.")
+
+
+def search_many_args_validation(keys):
+    """DBManager.search_many() arguments validation."""
+
+    if not isinstance(keys, (list, tuple)):
+        raise TypeError(f"'keys' argument must be list not {type(keys).__name__} type.")
+    for key in keys:
+        if not isinstance(key, tuple) or len(key) != 3:
+            raise TypeError("Required key format ('vehicle', 'yyyy-mm-dd', 'yyyy-mm-dd').")
+        if not isinstance(key[0], str):
+            raise TypeError(f"key vehicle must be str not {type(key[0]).__name__} type.")
+        for arg in key[1:]:
+            if not isinstance(arg, str) and arg is not None:
+                raise TypeError("Required key format ('vehicle', 'yyyy-mm-dd', 'yyyy-mm-dd').")
+
+
+def position_args_validation(vehicle, method):
+    """TimeIndex.position() arguments validation."""
+
+    if not isinstance(vehicle, str):
+        raise TypeError(f"'vehicle' argument must be str not {type(vehicle).__name__} type.")
+    if method not in ('interpolate', 'nearest'):
+        raise ValueError(f"'method' argument must be 'interpolate' or 'nearest' not {method!r}.")
+
+
+def report_args_validation(vehicles, date_range, reports, known_reports, image_format):
+    """BatchReportRenderer.render() arguments validation."""
+
+    if not isinstance(vehicles, (list, tuple)):
+        raise TypeError(f"'vehicles' argument must be list not {type(vehicles).__name__} type.")
+    for vehicle in vehicles:
+        search_values_args_validation(vehicle, '', date_range)
+
+    if not isinstance(reports, (list, tuple)):
+        raise TypeError(f"'reports' argument must be list not {type(reports).__name__} type.")
+    unknown = set(reports) - set(known_reports)
+    if unknown:
+        raise ValueError(f"Unknown reports: {sorted(unknown)}. Available reports: {list(known_reports)}.")
+
+    if image_format not in (None, 'png', 'jpeg', 'svg', 'pdf'):
+        raise ValueError(f"'image_format' argument must be 'png', 'jpeg', 'svg', 'pdf' or None "
+                         f"not {image_format!r}.")
+
+
+def archive_args_validation(until):
+    """DBManager.archive() arguments validation."""
+
+    if not isinstance(until, str) and until is not None:
+        raise TypeError(f"'until' argument must be str not {type(until).__name__} type. Required format 'yyyy-mm'.")
+    if until is not None and (len(until) != 7 or until[4] != '-' or not (until[:4] + until[5:]).isdigit()):
+        raise ValueError("Required 'until' format 'yyyy-mm'.")
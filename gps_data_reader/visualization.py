@@ -0,0 +1,183 @@
+import folium
+import pandas as pd
+from plotly.subplots import make_subplots
+import plotly.graph_objects as go
+
+
+def add_start_end_points_to_map(reader, route_map):
+    """Adds start/end points of GpsDataReader selection to folium map."""
+
+    # coords for start end points
+    start, end = reader._get_start_end_coordinates()
+
+    # start/end points data
+    start_end_data = pd.DataFrame(reader._get_start_end_data())
+    first_iloc = start_end_data.iloc[0]
+    last_iloc = start_end_data.iloc[-1]
+
+    # string block to display after click POPUP
+    start_popup = folium.Popup(
+        f"START POINT<br>dt: {first_iloc['dt']}<br>vehicle: {first_iloc['vehicle']}<br>"
+        f"driver: {first_iloc['driver']}<br>position: {first_iloc['position']}<br>"
+        f"country: {first_iloc['country']}<br>speed: {first_iloc['speed']}<br>"
+        f"mileage: {first_iloc['mileage']}",
+        max_width=900)
+
+    end_popup = folium.Popup(
+        f"END POINT<br>dt: {last_iloc['dt']}<br>vehicle: {last_iloc['vehicle']}<br>"
+        f"driver: {last_iloc['driver']}<br>position: {last_iloc['position']}<br>"
+        f"country: {last_iloc['country']}<br>speed: {last_iloc['speed']}<br>"
+        f"mileage: {last_iloc['mileage']}",
+        max_width=900)
+
+    # string block to display TOOLTIP
+    start_tooltip = f" {first_iloc['dt']};\n {first_iloc['vehicle']}; {first_iloc['position']}," \
+                    f"{first_iloc['country']}"
+    end_tooltip = f"{last_iloc['dt']};\n {last_iloc['vehicle']}; {last_iloc['position']}; {last_iloc['country']}"
+
+    # add points to the map
+    # start point
+    folium.Marker(start, icon=folium.Icon(color='black', icon='play', prefix='fa', max_width=900),
+                  popup=start_popup, tooltip=start_tooltip).add_to(route_map)
+    # end point
+    folium.Marker(end, icon=folium.Icon(color='black', icon='flag-checkered', prefix='fa'), popup=end_popup,
+                  tooltip=end_tooltip).add_to(route_map)
+
+
+def add_crossing_borders_to_map(reader, route_map):
+    """Adds border crossing points of GpsDataReader selection to folium map."""
+
+    cross_df = reader.crossing_borders()
+
+    # border crossing points
+    for i in range(len(cross_df)):
+        point = cross_df.iloc[i]
+        if point['borders'] not in ('entry', 'exit'):  # skip start and end points
+            continue
+
+        # popup and toolip string blocks - detail: country of previous (entry) or next (exit) point of vehicle
+        from_condition = point['detail'] if point['borders'] == 'entry' else point['country']
+        to_condition = point['country'] if point['borders'] == 'entry' else point['detail']
+
+        i_popup = folium.Popup(f"dt: {point['dt']}<br>vehicle: {point['vehicle']}<br>"
+                               f"driver: {point['driver']}<br>position: {point['position']}"
+                               f"<br>country: {point['country']}<br>"
+                               f"Occurence: From {from_condition} To {to_condition}",
+                               max_width=900)
+
+        i_tooltip = f"{point['dt']};\n {point['vehicle']}; {point['position']}, {point['country']}"
+
+        # entry points
+        if point['borders'] == 'entry':
+            folium.Marker((point['latitude'], point['longitude']),
+                          icon=folium.Icon(color='green', icon='sign-in', prefix='fa', max_width=900),
+                          popup=i_popup, tooltip=i_tooltip).add_to(route_map)
+        # exit points
+        else:
+            folium.Marker((point['latitude'], point['longitude']),
+                          icon=folium.Icon(color='red', icon='sign-out', prefix='fa', max_width=900),
+                          popup=i_popup, tooltip=i_tooltip).add_to(route_map)
+
+
+def route_map(reader, crossing_broders=False):
+    """Gps trace signal map of GpsDataReader selection (see GpsDataReader.route_map)."""
+    gps = pd.DataFrame(reader.gps_data.copy())
+    gps.drop('id', axis=1, inplace=True)
+
+    coordinates = list(reader._get_coordinates())
+
+    # start location point
+    start_location = (coordinates[0][0], coordinates[0][1])
+
+    route_map = folium.Map(location=start_location, zoom_start=6)
+
+    i = 0
+    for coords in coordinates:
+        popup = folium.Popup(
+            f"dt: {gps.iloc[i]['dt']}<br>vehicle: {gps.iloc[i]['vehicle']}<br>"
+            f"driver: {gps.iloc[i]['driver']}<br>position: {gps.iloc[i]['position']}<br>"
+            f"country: {gps.iloc[i]['country']}<br>speed: {gps.iloc[i]['speed']}<br>"
+            f"mileage: {gps.iloc[i]['mileage']}",
+            max_width=900)
+        folium.CircleMarker(location=coords,
+                            popup=popup,
+                            tooltip=f"{gps.iloc[i]['dt']};\n {gps.iloc[i]['vehicle']}; "
+                                    f"{gps.iloc[i]['position']}, {gps.iloc[i]['country']}",
+                            radius=2, weight=4,
+                            color='#6495ED',
+                            bubblingMouseEvents=False, ).add_to(route_map)
+        i += 1
+
+    add_start_end_points_to_map(reader, route_map=route_map)
+
+    if crossing_broders:
+        add_crossing_borders_to_map(reader, route_map)
+
+    return route_map
+
+
+def crossing_borders_map(reader):
+    """Crossing borders map of GpsDataReader selection (see GpsDataReader.crossing_borders_map)."""
+    start_location = reader._get_start_end_coordinates()[0]
+
+    route_map = folium.Map(location=start_location, zoom_start=6)
+    add_start_end_points_to_map(reader, route_map)
+    add_crossing_borders_to_map(reader, route_map)
+    return route_map
+
+
+def distance_diagram(reader, show=True):
+    """Travelled distance diagram of GpsDataReader selection (see GpsDataReader.distance_diagram)."""
+    distance_df = reader._get_df_for_diagrams()
+
+    def km_per_point(df):
+        aux_list = []
+        for i in range(0, len(df['mileage'])):
+            if i == len(df['mileage']) - 1:
+                aux_list.append(df['mileage'].max() - df['mileage'].iloc[i])
+            else:
+                aux_list.append(df['mileage'].iloc[i + 1] - df['mileage'].iloc[i])
+        return aux_list
+
+    # distance - per point, cumsum, grouped by day
+    km_per_point_list = km_per_point(distance_df)
+    distance_df['km'] = km_per_point_list
+    distance_df['km_cumsum'] = distance_df['km'].cumsum()
+    date_grouped = reader.daily_distance()
+
+    # prepare plot
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Bar(x=date_grouped.index, y=date_grouped, name='km/day'))
+
+    fig.add_trace(go.Scatter(x=distance_df['dt'], y=distance_df['km_cumsum'], name='km'), secondary_y=True)
+
+    fig.update_layout(title_text='KM diagram', width=1000,
+                      xaxis=dict(
+                          tickmode='linear'))
+
+    fig.update_yaxes(title_text="km", secondary_y=False)
+    fig.update_yaxes(title_text="km cumsum", secondary_y=True)
+
+    if show:
+        fig.show()
+    return fig
+
+
+def speed_diagram(reader, show=True):
+    """Vehicle speed diagram of GpsDataReader selection (see GpsDataReader.speed_diagram)."""
+    speed_df = reader._get_df_for_diagrams()
+
+    fig = go.Figure(layout=go.Layout(yaxis=dict(range=[0, 100])))
+
+    fig.add_trace(go.Scatter(x=speed_df['dt'], y=speed_df['speed'], name='speed (km/h)'))
+
+    fig.add_trace(go.Scatter(x=speed_df.groupby('date').agg('mean')['speed'].index,
+                             y=speed_df.groupby('date').agg('mean')['speed'],
+                             name='day mean'))
+
+    fig.update_layout(title_text='Speed diagram', width=1000, yaxis_title='km/h',
+                      xaxis=dict(
+                          tickmode='linear'))
+    if show:
+        fig.show()
+    return fig